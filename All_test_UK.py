@@ -2,6 +2,7 @@
 import os
 import subprocess
 import sys
+import json
 import traceback
 import time
 import threading
@@ -16,6 +17,9 @@ import tempfile
 
 exit_program_event = threading.Event()
 TEST_SCRIPTS_DIR = "argon-scripts/Argon_Notebook_Test-main"
+POWER_SAMPLE_INTERVAL = 0.2
+POWER_MAX_GAP = 2.0
+SHM_MAX_AGE = 2.0
 
 def clear_screen():
     pass  # Not needed in GUI
@@ -372,7 +376,6 @@ def run_camera(stop_event, output_text):
                 
 def run_electricity_power(output_text):
     """Run electricity power test with GUI output"""
-    messagebox.showinfo("Electricity Power Test", "读取电量要跟桌面电量显示相同")
     output_text.insert(tk.END, "\nStarting Electricity Power Test...\n", "info")
     output_text.see(tk.END)
     output_text.update()
@@ -382,19 +385,32 @@ def run_electricity_power(output_text):
         if not os.path.exists(script_path):
             raise Exception(f"{script_path} not found. Please check the directory.")
     
+        verdict = None
         process = subprocess.Popen(["python3", script_path], stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
         for line in process.stdout:
+            if line.startswith("VERDICT "):
+                try:
+                    verdict = json.loads(line[len("VERDICT "):])
+                except ValueError:
+                    output_text.insert(tk.END, "Could not parse power test verdict\n", "error")
+                continue
             output_text.insert(tk.END, line)
             output_text.see(tk.END)
             output_text.update()
         process.wait()
     
-        if process.returncode == 0:
+        if verdict is None:
+            output_text.insert(tk.END, f"Electricity power test produced no verdict (exit code {process.returncode})\n", "error")
+            return f"run_electricity_power____NO: No verdict, exit code {process.returncode}"
+        if verdict["passed"] and process.returncode == 0:
             output_text.insert(tk.END, "Electricity power test completed successfully!\n", "success")
             return "run_electricity_power____YES"
-        else:
-            output_text.insert(tk.END, f"Electricity power test failed with exit code: {process.returncode}\n", "error")
-            return f"run_electricity_power____NO: Exit code {process.returncode}"
+        failures = [f"{name}: {field['reason']}" for name, field in verdict["fields"].items() if not field["passed"]]
+        if verdict["errors"]:
+            failures.append(f"{verdict['errors']} read errors")
+        reason = ", ".join(failures) or f"exit code {process.returncode}"
+        output_text.insert(tk.END, f"Electricity power test failed: {reason}\n", "error")
+        return f"run_electricity_power____NO: {reason}"
     except Exception as e:
         output_text.insert(tk.END, f"Error running electricity power test: {str(e)}\n", "error")
         return f"run_electricity_power____NO: {str(e)}"
@@ -808,6 +824,108 @@ def stop_restart_test(output_text):
     except Exception as e:
         output_text.insert(tk.END, f"Stop failed: {str(e)}\n", "error")
 
+class PowerMeter:
+    """Samples CW2217 voltage/current in a background thread and integrates battery draw per test.
+
+    Uses the shared-memory telemetry of a running CW2217_sampler.py --publish
+    when it is fresh, otherwise reads the gauge over I2C directly.
+    """
+
+    def __init__(self, interval=POWER_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.source = None
+        self.read_sample = None
+        self.last = None
+        self.current_test = None
+
+    def _open_source(self):
+        if TEST_SCRIPTS_DIR not in sys.path:
+            sys.path.insert(0, TEST_SCRIPTS_DIR)
+        try:
+            from CW2217_shm import TelemetryReader
+            reader = TelemetryReader()
+            sample = reader.read()
+            if sample is not None and time.monotonic() - sample["monotonic"] < SHM_MAX_AGE:
+                def read_shm():
+                    s = reader.read()
+                    return None if s is None else (s["monotonic"], s["voltage"], s["current"])
+                return "shared memory", read_shm
+            reader.close()
+        except Exception:
+            pass
+        try:
+            import smbus
+            from CW2217 import I2C_BUS, decode_registers, read_registers
+            bus = smbus.SMBus(I2C_BUS)
+            def read_bus():
+                voltage, _, _, current = decode_registers(read_registers(bus))
+                return time.monotonic(), voltage, current
+            return "I2C", read_bus
+        except Exception as e:
+            print(f"Power metering unavailable: {e}", flush=True)
+            return None, None
+
+    def start(self):
+        self.source, self.read_sample = self._open_source()
+        if self.read_sample is None:
+            return False
+        self.thread = threading.Thread(target=self._run, name="power-meter", daemon=True)
+        self.thread.start()
+        return True
+
+    def _run(self):
+        while not self.stop_event.wait(self.interval):
+            try:
+                sample = self.read_sample()
+            except Exception:
+                continue
+            if sample is None:
+                continue
+            try:
+                self._add_sample(sample)
+            except Exception as e:
+                # One bad sample must not stop metering for the remaining tests
+                print(f"Power meter sample skipped: {e}", flush=True)
+
+    def _add_sample(self, sample):
+        timestamp, voltage, current = sample
+        with self.lock:
+            test = self.current_test
+            last = self.last
+            # begin() resets self.last under the same lock, so it cannot change between check and use
+            if test is None or (last is not None and timestamp <= last[0]):
+                return
+            # Positive = drawn from the battery (CW2217 current is negative when discharging)
+            power = -voltage * current
+            if last is not None and timestamp - last[0] <= POWER_MAX_GAP:
+                test["energy_j"] += 0.5 * (power + last[1]) * (timestamp - last[0])
+            test["peak_current"] = max(test["peak_current"], -current)
+            test["samples"] += 1
+            self.last = (timestamp, power)
+
+    def begin(self, name):
+        with self.lock:
+            self.last = None
+            self.current_test = {"name": name, "energy_j": 0.0, "peak_current": 0.0,
+                                 "samples": 0, "start": time.monotonic()}
+
+    def end(self):
+        with self.lock:
+            test, self.current_test = self.current_test, None
+        if test is None or not test["samples"]:
+            return None
+        test["duration"] = time.monotonic() - test["start"]
+        test["energy_mwh"] = test["energy_j"] / 3.6
+        return test
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join()
+
 def run_all_tests(output_text, progress_bar, run_button):
     """Run all tests sequentially and report results"""
     run_button.config(state=tk.DISABLED)
@@ -832,6 +950,13 @@ def run_all_tests(output_text, progress_bar, run_button):
     output_text.insert(tk.END, "="*50 + "\n", "info")
     output_text.see(tk.END)
     
+    power_meter = PowerMeter()
+    if power_meter.start():
+        output_text.insert(tk.END, f"Measuring battery draw per test via {power_meter.source}\n", "info")
+    else:
+        power_meter = None
+    energy = {}
+    
     for i, (name, test_func) in enumerate(test_cases):
         if stop_event.is_set() or exit_program_event.is_set():
             output_text.insert(tk.END, "\nTesting interrupted by user\n", "warning")
@@ -845,6 +970,8 @@ def run_all_tests(output_text, progress_bar, run_button):
         output_text.see(tk.END)
         output_text.update_idletasks()
         
+        if power_meter:
+            power_meter.begin(name)
         try:
             result = test_func()
             results.append((name, result))
@@ -859,6 +986,12 @@ def run_all_tests(output_text, progress_bar, run_button):
             results.append((name, error_msg))
             output_text.insert(tk.END, f"! Critical error: {str(e)}\n", "error")
             stop_event.set()
+        finally:
+            if power_meter:
+                energy[name] = power_meter.end()
+    
+    if power_meter:
+        power_meter.stop()
     
     progress_bar['value'] = 100
     progress_bar.update()
@@ -879,6 +1012,17 @@ def run_all_tests(output_text, progress_bar, run_button):
             failed += 1
     
     output_text.insert(tk.END, f"\nTotal: {passed} passed, {failed} failed\n", "bold")
+    
+    if power_meter:
+        output_text.insert(tk.END, "\nBattery draw per test (positive = discharging):\n", "info")
+        for name, _ in results:
+            usage = energy.get(name)
+            if usage is None:
+                output_text.insert(tk.END, f"  {name}: no samples\n")
+                continue
+            output_text.insert(tk.END, f"  {name}: {usage['energy_j']:.1f} J ({usage['energy_mwh']:.2f} mWh), "
+                                       f"peak {usage['peak_current']:.3f} A, "
+                                       f"avg {usage['energy_j'] / usage['duration']:.2f} W over {usage['duration']:.0f} s\n")
     output_text.see(tk.END)
     
     run_button.config(state=tk.NORMAL)
@@ -1,7 +1,10 @@
 import smbus
 import time
+import os
+import hashlib
 from datetime import datetime 
-import subprocess
+
+from CW2217_profile import load_profile, read_profile
 
 I2C_BUS = 1  
 CW2217_ADDRESS = 0x64  
@@ -15,91 +18,194 @@ CONTROL_REG = 0x08
 CURRENT_MSB_REG = 0x0E
 CURRENT_LSB_REG = 0x0F
 R_SENSE = 10.0
+BLOCK_START_REG = VCELL_HIGH_REG
+BLOCK_LENGTH = CURRENT_LSB_REG - BLOCK_START_REG + 1
+SOC_ALERT_REG = 0x0B
+IC_STATE_REG = 0xA7
+
+CONTROL_SLEEP = 0xF0
+CONTROL_RESTART = 0x30
+CONTROL_ACTIVE = 0x00
+CONFIG_UPDATE_FLAG = 0x80
+IC_READY_MASK = 0x0C
+MODE_SETTLE_TIME = 0.02
+READY_TIMEOUT = 3.0
+READY_POLL_INTERVAL = 0.05
+# Consecutive block read failures before switching to per-byte reads, and how
+# long to stay on per-byte reads before trying a block read again
+BLOCK_READ_FAILURE_LIMIT = 3
+BLOCK_READ_RETRY_INTERVAL = 60.0
+
+FINGERPRINT_PATH = os.path.join(os.path.expanduser("~"), ".cache", "cw2217_fingerprint")
+
+block_read_failures = 0
+block_read_retry_at = 0.0
 
 def check_initialization(bus):
-   
     try:
         
         control_val = bus.read_byte_data(CW2217_ADDRESS, CONTROL_REG)
-        print(f"CONTROL_REG value: 0x{control_val:02X}")
+        print(f"CONTROL_REG (0x08) value: 0x{control_val:02X}")
         
-        return control_val != 0x00
+        alert_val = bus.read_byte_data(CW2217_ADDRESS, SOC_ALERT_REG)
+        print(f"Register 0x0B value: 0x{alert_val:02X}")
+
+        return control_val != CONTROL_ACTIVE or not alert_val & CONFIG_UPDATE_FLAG
     except Exception as e:
-        print(f"Error reading CONTROL_REG: {e}")
+        print(f"Error reading registers: {e}")
         
         return True
 
+def read_fingerprint(bus):
+    # Profile contents plus the mode register and config-update flag, which are what
+    # initialization sets; the alert threshold bits of 0x0B are left to CW2217_alert.py
+    try:
+        state = read_profile(bus)
+        state.append(bus.read_byte_data(CW2217_ADDRESS, CONTROL_REG))
+        state.append(bus.read_byte_data(CW2217_ADDRESS, SOC_ALERT_REG) & CONFIG_UPDATE_FLAG)
+        return hashlib.sha1(bytes(state)).hexdigest()
+    except Exception as e:
+        print(f"Error reading fingerprint: {e}")
+        return None
+
+def load_fingerprint(path=FINGERPRINT_PATH):
+    try:
+        with open(path) as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+def save_fingerprint(fingerprint, path=FINGERPRINT_PATH):
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(fingerprint + "\n")
+    except OSError as e:
+        print(f"Could not save fingerprint to {path}: {e}")
+
+def wait_until_ready(bus, timeout=READY_TIMEOUT):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            state = bus.read_byte_data(CW2217_ADDRESS, IC_STATE_REG)
+            if state & IC_READY_MASK == IC_READY_MASK:
+                return True
+        except Exception as e:
+            print(f"Error reading IC state: {e}")
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(READY_POLL_INTERVAL)
 
 def initialize_cw2217(bus):
     try:
-        bus.write_byte_data(CW2217_ADDRESS, CONTROL_REG, 0xF0)
-        time.sleep(0.5)
-        bus.write_byte_data(CW2217_ADDRESS, CONTROL_REG, 0x30)
-        time.sleep(0.5)  
-        bus.write_byte_data(CW2217_ADDRESS, CONTROL_REG, 0x00)
-        time.sleep(0.5)  
+        bus.write_byte_data(CW2217_ADDRESS, CONTROL_REG, CONTROL_SLEEP)
+        time.sleep(MODE_SETTLE_TIME)
+        bus.write_byte_data(CW2217_ADDRESS, CONTROL_REG, CONTROL_RESTART)
+        time.sleep(MODE_SETTLE_TIME)
+        bus.write_byte_data(CW2217_ADDRESS, CONTROL_REG, CONTROL_ACTIVE)
         
-        bus.write_byte_data(CW2217_ADDRESS, 0x0b, 0x80)
-        time.sleep(0.5)  
+        bus.write_byte_data(CW2217_ADDRESS, SOC_ALERT_REG, CONFIG_UPDATE_FLAG)
+        if not wait_until_ready(bus):
+            print(f"CW2217 not ready after {READY_TIMEOUT:.1f} s")
+            return False
         print("CW2217 initialized successfully")
+        return True
     except Exception as e:
         print(f"Initialization failed: {e}")
+        return False
 
-def read_data(bus):
-    try:
-         
-        vcell_high = bus.read_byte_data(CW2217_ADDRESS, VCELL_HIGH_REG)
-        vcell_low = bus.read_byte_data(CW2217_ADDRESS, VCELL_LOW_REG)
-        voltage = ((((vcell_high << 8) | vcell_low) & 0x3FFF) * 0.0003125)*3
+def decode_registers(block):
+    vcell_high = block[VCELL_HIGH_REG - BLOCK_START_REG]
+    vcell_low = block[VCELL_LOW_REG - BLOCK_START_REG]
+    voltage = ((((vcell_high << 8) | vcell_low) & 0x3FFF) * 0.0003125)*3
 
-        
-        soc_high = bus.read_byte_data(CW2217_ADDRESS, SOC_HIGH_REG)
-        soc_low = bus.read_byte_data(CW2217_ADDRESS, SOC_LOW_REG)
-        soc_raw = soc_high + (soc_low / 256.0)
-        soc = min(max(soc_raw, 0.0), 100.0)
+    soc_high = block[SOC_HIGH_REG - BLOCK_START_REG]
+    soc_low = block[SOC_LOW_REG - BLOCK_START_REG]
+    soc_raw = soc_high + (soc_low / 256.0)
+    soc = min(max(soc_raw, 0.0), 100.0)
 
-        
-        temp = bus.read_byte_data(CW2217_ADDRESS, TEMP_REG)
-        temp_c = -40 + (temp / 2)
+    temp = block[TEMP_REG - BLOCK_START_REG]
+    temp_c = -40 + (temp / 2)
 
-        
-        current_msb = bus.read_byte_data(CW2217_ADDRESS, CURRENT_MSB_REG)
-        current_lsb = bus.read_byte_data(CW2217_ADDRESS, CURRENT_LSB_REG)
-        raw_current = int.from_bytes([current_msb, current_lsb], byteorder='big', signed=True)
-        current = (52.4 * raw_current) / (32768 * R_SENSE)
+    current_msb = block[CURRENT_MSB_REG - BLOCK_START_REG]
+    current_lsb = block[CURRENT_LSB_REG - BLOCK_START_REG]
+    raw_current = int.from_bytes([current_msb, current_lsb], byteorder='big', signed=True)
+    current = (52.4 * raw_current) / (32768 * R_SENSE)
 
-        
-        return voltage, soc, temp_c, current
-        
+    return voltage, soc, temp_c, current
+
+def read_registers_block(bus):
+    # One I2C transaction for 0x02-0x0F, so VCELL/SOC/CURRENT come from the same instant
+    block = bus.read_i2c_block_data(CW2217_ADDRESS, BLOCK_START_REG, BLOCK_LENGTH)
+    if len(block) != BLOCK_LENGTH:
+        raise IOError(f"Short block read: {len(block)} of {BLOCK_LENGTH} bytes")
+    return block
+
+def read_registers_bytes(bus):
+    # Fallback for adapters without I2C block support: one transaction per register
+    block = [0] * BLOCK_LENGTH
+    for reg in (VCELL_HIGH_REG, VCELL_LOW_REG, SOC_HIGH_REG, SOC_LOW_REG,
+                TEMP_REG, CURRENT_MSB_REG, CURRENT_LSB_REG):
+        block[reg - BLOCK_START_REG] = bus.read_byte_data(CW2217_ADDRESS, reg)
+    return block
+
+def read_registers(bus):
+    global block_read_failures, block_read_retry_at
+    if block_read_failures < BLOCK_READ_FAILURE_LIMIT or time.monotonic() >= block_read_retry_at:
+        try:
+            block = read_registers_block(bus)
+            block_read_failures = 0
+            return block
+        except Exception as e:
+            block = read_registers_bytes(bus)
+            block_read_failures += 1
+            if block_read_failures == BLOCK_READ_FAILURE_LIMIT:
+                # The bus works but block reads keep failing, stop trying them on every sample
+                print(f"Block read failed {block_read_failures} times ({e}), "
+                      f"falling back to per-byte reads for {BLOCK_READ_RETRY_INTERVAL:.0f} s")
+            if block_read_failures >= BLOCK_READ_FAILURE_LIMIT:
+                block_read_retry_at = time.monotonic() + BLOCK_READ_RETRY_INTERVAL
+            return block
+    return read_registers_bytes(bus)
+
+def read_data(bus):
+    try:
+        return decode_registers(read_registers(bus))
     except Exception as e:
         print(f"Read failed: {e}")
         return None, None, None, None
 
+def ensure_initialized(bus):
+    fingerprint = read_fingerprint(bus)
+    saved = load_fingerprint()
+    if fingerprint is not None and fingerprint == saved:
+        print("CW2217 state matches saved fingerprint, skipping initialization.")
+        return True
+
+    if not check_initialization(bus):
+        if saved is None and fingerprint is not None:
+            # First run against an already configured gauge: remember this state
+            save_fingerprint(fingerprint)
+            print("CW2217 already initialized, skipping initialization.")
+            return True
+        print("CW2217 state differs from saved fingerprint")
+    print("CW2217 requires initialization")
+    
+    if not load_profile(bus):
+        print("Battery profile could not be loaded")
+        return False
+    if not initialize_cw2217(bus):
+        return False
+    
+    fingerprint = read_fingerprint(bus)
+    if fingerprint is not None:
+        save_fingerprint(fingerprint)
+    return True
+
 def main():
     try:
         bus = smbus.SMBus(I2C_BUS)
-        if check_initialization(bus):
-            print("CW2217 requires initialization")
-            
-            
-            power_script = "/home/user/Desktop/power.sh"
-            print(f"Executing power script: {power_script}")
-            try:
-                
-                subprocess.run(['bash', power_script], check=True)
-                print("Power script executed successfully")
-            except subprocess.CalledProcessError as e:
-                print(f"Power script failed with error code: {e.returncode}")
-            except FileNotFoundError:
-                print(f"Script not found at {power_script}")
-            except Exception as e:
-                print(f"Error executing power script: {e}")
-            
-           
-            initialize_cw2217(bus)
-            time.sleep(3)  
-        else:
-            print("CW2217 already initialized, skipping initialization.")
+        ensure_initialized(bus)
         
         while True:
             voltage, soc, temp_c, current = read_data(bus)
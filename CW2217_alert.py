@@ -0,0 +1,131 @@
+import argparse
+import time
+from datetime import datetime
+
+import RPi.GPIO as GPIO
+import smbus
+
+from CW2217 import (CONFIG_UPDATE_FLAG, CW2217_ADDRESS, I2C_BUS, SOC_ALERT_REG,
+                    ensure_initialized, read_data)
+from CW2217_shm import SHM_PATH, TelemetryPublisher
+
+GPIO_CONFIG_REG = 0x0A
+# GPIO_CONFIG: bits 4-6 enable the min-temp, max-temp and SOC-change interrupts,
+# bits 0-2 are the matching flags and are cleared by writing 0 (CellWise reference driver)
+GPIO_SOC_CHANGE_ENABLE = 0x40
+GPIO_IRQ_FLAGS = 0x07
+SOC_ALERT_MASK = 0x7F
+DEFAULT_THRESHOLD = 10
+DEFAULT_HEARTBEAT = 300.0
+BOUNCE_TIME_MS = 50
+
+
+def program_alert(bus, threshold, soc_change=False):
+    """Set the low-SOC alert threshold (%), keeping the config-update flag in 0x0B."""
+    if not 0 <= threshold <= SOC_ALERT_MASK:
+        raise ValueError(f"Alert threshold must be 0-{SOC_ALERT_MASK}%, got {threshold}")
+    alert = bus.read_byte_data(CW2217_ADDRESS, SOC_ALERT_REG)
+    bus.write_byte_data(CW2217_ADDRESS, SOC_ALERT_REG, (alert & CONFIG_UPDATE_FLAG) | threshold)
+    config = bus.read_byte_data(CW2217_ADDRESS, GPIO_CONFIG_REG) & ~GPIO_IRQ_FLAGS
+    if soc_change:
+        config |= GPIO_SOC_CHANGE_ENABLE
+    else:
+        config &= ~GPIO_SOC_CHANGE_ENABLE
+    bus.write_byte_data(CW2217_ADDRESS, GPIO_CONFIG_REG, config & 0xFF)
+
+
+def clear_alert(bus):
+    # Releases ALRT; the gauge pulls it low again on the next event
+    config = bus.read_byte_data(CW2217_ADDRESS, GPIO_CONFIG_REG)
+    if config & GPIO_IRQ_FLAGS:
+        bus.write_byte_data(CW2217_ADDRESS, GPIO_CONFIG_REG, config & ~GPIO_IRQ_FLAGS & 0xFF)
+    return config & GPIO_IRQ_FLAGS
+
+
+def watch(bus, pin, threshold, heartbeat, publisher=None):
+    """Block on the ALRT line; the bus is only read on an alert edge or every `heartbeat` seconds."""
+    GPIO.setmode(GPIO.BCM)
+    # ALRT is open drain and active low
+    GPIO.setup(pin, GPIO.IN, pull_up_down=GPIO.PUD_UP)
+    samples = errors = 0
+    low = False
+    state = None
+    rechecked = False
+    # An alert already pending at startup never produces a falling edge
+    reason = "alert" if GPIO.input(pin) == GPIO.LOW else "startup"
+    while True:
+        flags = 0
+        if reason == "alert":
+            try:
+                flags = clear_alert(bus)
+            except Exception as e:
+                print(f"Error clearing alert: {e}")
+        voltage, soc, temp_c, current = read_data(bus)
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        if voltage is None:
+            errors += 1
+        else:
+            samples += 1
+            if publisher is not None:
+                publisher.publish(time.monotonic(), voltage, soc, temp_c, current, samples, errors)
+            charging = "charging" if current > 0 else "discharging"
+            if reason != "heartbeat" or charging != state:
+                print(f"[{timestamp}] {reason}{f' (flags 0x{flags:02X})' if flags else ''}: "
+                      f"{voltage:.3f} V  {soc:.2f}%  {temp_c:.1f} C  {current:.3f} A  {charging}")
+            state = charging
+            if soc <= threshold and not low:
+                print(f"[{timestamp}] LOW BATTERY: {soc:.1f}% (threshold {threshold}%)")
+            elif soc > threshold and low:
+                print(f"[{timestamp}] Battery above {threshold}% again")
+            low = soc <= threshold
+
+        # An alert raised after clear_alert() above, or while ALRT was already low, leaves the
+        # line low with no falling edge to wait for. Handle it now; if clearing did not release
+        # the line, retry only once per heartbeat instead of spinning.
+        if GPIO.input(pin) == GPIO.LOW and not rechecked:
+            reason = "alert"
+            rechecked = True
+            continue
+        rechecked = False
+        channel = GPIO.wait_for_edge(pin, GPIO.FALLING, bouncetime=BOUNCE_TIME_MS,
+                                     timeout=int(heartbeat * 1000))
+        reason = "heartbeat" if channel is None else "alert"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Wait for CW2217 ALRT interrupts instead of polling")
+    parser.add_argument("--pin", type=int, required=True, help="BCM GPIO wired to the CW2217 ALRT output")
+    parser.add_argument("--threshold", type=int, default=DEFAULT_THRESHOLD, help="low-SOC alert level in %%")
+    parser.add_argument("--heartbeat", type=float, default=DEFAULT_HEARTBEAT,
+                        help="seconds between reads when no alert arrives")
+    parser.add_argument("--soc-change", action="store_true", help="also interrupt on every 1%% SOC change")
+    parser.add_argument("--publish", nargs="?", const=SHM_PATH, default=None, metavar="PATH",
+                        help=f"publish readings to shared memory (default {SHM_PATH}); "
+                             "refused while CW2217_sampler.py publishes to the same PATH")
+    args = parser.parse_args()
+
+    bus = smbus.SMBus(I2C_BUS)
+    publisher = None
+    try:
+        ensure_initialized(bus)
+        program_alert(bus, args.threshold, args.soc_change)
+        print(f"Alert threshold {args.threshold}%, waiting on GPIO{args.pin} "
+              f"(heartbeat {args.heartbeat:g} s)")
+        if args.publish:
+            try:
+                publisher = TelemetryPublisher(args.publish)
+            except RuntimeError as e:
+                print(f"Cannot publish: {e}")
+                return
+        watch(bus, args.pin, args.threshold, args.heartbeat, publisher)
+    except KeyboardInterrupt:
+        print("\nStopped by user")
+    finally:
+        if publisher is not None:
+            publisher.close()
+        GPIO.cleanup()
+        bus.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+import argparse
+import os
+import sys
+
+import numpy as np
+
+from CW2217_log import BinaryLogReader, list_segments
+
+COLUMNS = ("time", "voltage", "soc", "temp", "current")
+MAX_GAP = 10.0
+MIN_SOC_SPAN = 5.0
+MIN_CURRENT_STEP = 0.2
+FIT_DEGREE = 3
+FIT_MIN_BINS = 10
+CURVE_POINTS = 50
+DEFAULT_TOLERANCE = 0.1
+
+
+def load_csv(path):
+    """Load a sampler CSV log (time,voltage,soc,temp,current) into sorted column arrays."""
+    data = np.loadtxt(path, delimiter=",", skiprows=1, ndmin=2)
+    if data.shape[1] != len(COLUMNS):
+        raise ValueError(f"{path}: expected {len(COLUMNS)} columns, got {data.shape[1]}")
+    data = data[np.argsort(data[:, 0], kind="stable")]
+    return {name: data[:, i] for i, name in enumerate(COLUMNS)}
+
+
+def load_binary(path):
+    """Load a binary log segment or a directory of segments (see CW2217_log.py)."""
+    parts = {name: [] for name in COLUMNS}
+    for segment in list_segments(path):
+        reader = BinaryLogReader(segment)
+        try:
+            records = reader.to_numpy()
+            for name in COLUMNS:
+                parts[name].append(records[name].astype(np.float64))
+            del records
+        finally:
+            reader.close()
+    if not parts["time"]:
+        raise ValueError(f"{path}: no log segments")
+    samples = {name: np.concatenate(parts[name]) for name in COLUMNS}
+    order = np.argsort(samples["time"], kind="stable")
+    return {name: column[order] for name, column in samples.items()}
+
+
+def load_log(path):
+    if os.path.isdir(path) or not path.endswith(".csv"):
+        return load_binary(path)
+    return load_csv(path)
+
+
+def _intervals(t, max_gap):
+    dt = np.diff(t)
+    # Gaps (sampler stopped, logs concatenated) must not be integrated across
+    return np.where(dt <= max_gap, dt, 0.0)
+
+
+def coulomb_count(t, current, max_gap=MAX_GAP):
+    """Integrated charge in Ah (trapezoidal, positive = charging)."""
+    if len(t) < 2:
+        return 0.0
+    dt = _intervals(t, max_gap)
+    return float(np.sum(0.5 * (current[1:] + current[:-1]) * dt) / 3600.0)
+
+
+def energy(t, voltage, current, max_gap=MAX_GAP):
+    """Integrated energy in Wh (positive = charging)."""
+    if len(t) < 2:
+        return 0.0
+    power = voltage * current
+    dt = _intervals(t, max_gap)
+    return float(np.sum(0.5 * (power[1:] + power[:-1]) * dt) / 3600.0)
+
+
+def effective_capacity(t, soc, current, max_gap=MAX_GAP):
+    """Capacity in mAh extrapolated from charge moved over the observed SOC span."""
+    if len(soc) < 2:
+        return None
+    soc_span = soc[-1] - soc[0]
+    if abs(soc_span) < MIN_SOC_SPAN:
+        return None
+    return abs(coulomb_count(t, current, max_gap)) * 1000.0 / (abs(soc_span) / 100.0)
+
+
+def internal_resistance(voltage, current, min_step=MIN_CURRENT_STEP):
+    """Median dV/dI over sample-to-sample load steps, in ohms."""
+    dv = np.diff(voltage)
+    di = np.diff(current)
+    steps = np.abs(di) >= min_step
+    if not np.any(steps):
+        return None
+    return float(np.median(dv[steps] / di[steps]))
+
+
+def soc_voltage_fit(soc, voltage, degree=FIT_DEGREE):
+    """Polynomial voltage(SOC) fit on per-percent bin means, or None without enough spread."""
+    bins = np.clip(soc, 0.0, 100.0).astype(np.int64)
+    counts = np.bincount(bins, minlength=101)
+    sums = np.bincount(bins, weights=voltage, minlength=101)
+    occupied = counts > 0
+    if np.count_nonzero(occupied) < max(FIT_MIN_BINS, degree + 1):
+        return None
+    centers = np.nonzero(occupied)[0] + 0.5
+    means = sums[occupied] / counts[occupied]
+    coeffs = np.polyfit(centers, means, degree, w=np.sqrt(counts[occupied]))
+    return coeffs, float(centers[0] - 0.5), float(centers[-1] + 0.5)
+
+
+def analyze_unit(samples, max_gap=MAX_GAP, min_step=MIN_CURRENT_STEP):
+    t = samples["time"]
+    voltage = samples["voltage"]
+    soc = samples["soc"]
+    current = samples["current"]
+    return {
+        "samples": len(t),
+        "duration_h": float(t[-1] - t[0]) / 3600.0 if len(t) else 0.0,
+        "charge_mAh": coulomb_count(t, current, max_gap) * 1000.0,
+        "energy_Wh": energy(t, voltage, current, max_gap),
+        "capacity_mAh": effective_capacity(t, soc, current, max_gap),
+        "resistance_ohm": internal_resistance(voltage, current, min_step),
+        "fit": soc_voltage_fit(soc, voltage),
+    }
+
+
+def flag_outliers(results, tolerance=DEFAULT_TOLERANCE, points=CURVE_POINTS):
+    """Compare every unit's SOC-voltage curve with the fleet median on their common SOC range.
+
+    Sets "curve_deviation_V" (max absolute deviation) and "outlier" on each result.
+    """
+    fitted = [name for name, r in results.items() if r["fit"] is not None]
+    for r in results.values():
+        r["curve_deviation_V"] = None
+        r["outlier"] = False
+    if len(fitted) < 3:
+        return None
+    lo = max(results[name]["fit"][1] for name in fitted)
+    hi = min(results[name]["fit"][2] for name in fitted)
+    if hi - lo < MIN_SOC_SPAN:
+        return None
+    grid = np.linspace(lo, hi, points)
+    curves = np.vstack([np.polyval(results[name]["fit"][0], grid) for name in fitted])
+    median = np.median(curves, axis=0)
+    deviation = np.max(np.abs(curves - median), axis=1)
+    for name, dev in zip(fitted, deviation):
+        results[name]["curve_deviation_V"] = float(dev)
+        results[name]["outlier"] = bool(dev > tolerance)
+    return grid, median
+
+
+def _fmt(value, width, precision):
+    return f"{'-':>{width}}" if value is None else f"{value:>{width}.{precision}f}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Analyze CW2217 discharge/charge logs, one file per unit")
+    parser.add_argument("logs", nargs="+", help="sampler CSV logs, binary log segments or log directories")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="max SOC-voltage curve deviation from the fleet median, in volts")
+    parser.add_argument("--max-gap", type=float, default=MAX_GAP,
+                        help="seconds between samples treated as a gap in the log")
+    parser.add_argument("--min-step", type=float, default=MIN_CURRENT_STEP,
+                        help="current step in amps used for the resistance estimate")
+    args = parser.parse_args()
+
+    results = {}
+    for path in args.logs:
+        name = os.path.basename(os.path.normpath(path)).split(".")[0]
+        try:
+            samples = load_log(path)
+        except Exception as e:
+            print(f"{name}: failed to load {path}: {e}")
+            continue
+        if len(samples["time"]) < 2:
+            print(f"{name}: not enough samples")
+            continue
+        results[name] = analyze_unit(samples, args.max_gap, args.min_step)
+
+    flag_outliers(results, args.tolerance)
+
+    print(f"{'unit':<20} {'samples':>10} {'hours':>7} {'charge mAh':>11} {'energy Wh':>10} "
+          f"{'cap mAh':>8} {'R ohm':>7} {'dev V':>6}  verdict")
+    for name, r in results.items():
+        verdict = "OUTLIER" if r["outlier"] else ("ok" if r["curve_deviation_V"] is not None else "n/a")
+        print(f"{name:<20} {r['samples']:>10} {r['duration_h']:>7.2f} {r['charge_mAh']:>11.1f} "
+              f"{r['energy_Wh']:>10.2f} {_fmt(r['capacity_mAh'], 8, 0)} "
+              f"{_fmt(r['resistance_ohm'], 7, 3)} {_fmt(r['curve_deviation_V'], 6, 3)}  {verdict}")
+
+    outliers = [name for name, r in results.items() if r["outlier"]]
+    if outliers:
+        print(f"\nUnits deviating from the fleet median curve: {', '.join(outliers)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+import argparse
+import json
+import os
+import shutil
+import signal
+import subprocess
+from datetime import datetime
+
+import smbus
+
+from CW2217 import I2C_BUS, ensure_initialized
+from CW2217_log import BinaryLogWriter
+from CW2217_sampler import Sampler
+
+DEFAULT_RATE = 1.0
+DEFAULT_LOAD = 4
+DEFAULT_END_SOC = 5.0
+DEFAULT_FULL_CURRENT = 0.05
+DEFAULT_HOLD = 30.0
+DEFAULT_TIMEOUT_HOURS = 12.0
+IDLE_CURRENT = 0.02
+MAX_GAP = 10.0
+HISTORY = 600.0
+REPORT_INTERVAL = 60.0
+
+
+class CycleMeter:
+    """Running trapezoidal charge/energy integral; O(1) memory however long the phase runs."""
+
+    def __init__(self, max_gap=MAX_GAP):
+        self.max_gap = max_gap
+        self.start = None
+        self.last = None
+        self.charge_as = 0.0
+        self.energy_j = 0.0
+        self.peak_current = 0.0
+        self.soc_start = None
+        self.soc_end = None
+        self.voltage_min = None
+        self.voltage_max = None
+
+    def add(self, timestamp, voltage, soc, current):
+        if self.start is None:
+            self.start = timestamp
+            self.soc_start = soc
+            self.voltage_min = self.voltage_max = voltage
+        elif timestamp - self.last[0] <= self.max_gap:
+            # Gaps (bus stalls) are not integrated across
+            dt = timestamp - self.last[0]
+            self.charge_as += 0.5 * (current + self.last[2]) * dt
+            self.energy_j += 0.5 * (voltage * current + self.last[1] * self.last[2]) * dt
+        self.last = (timestamp, voltage, current)
+        self.soc_end = soc
+        self.voltage_min = min(self.voltage_min, voltage)
+        self.voltage_max = max(self.voltage_max, voltage)
+        if abs(current) > abs(self.peak_current):
+            self.peak_current = current
+
+    def result(self):
+        if self.start is None:
+            return None
+        charge_mah = abs(self.charge_as) / 3.6
+        soc_span = abs(self.soc_end - self.soc_start)
+        return {
+            "duration_h": (self.last[0] - self.start) / 3600.0,
+            "charge_mAh": charge_mah,
+            "energy_Wh": abs(self.energy_j) / 3600.0,
+            "soc_start": self.soc_start,
+            "soc_end": self.soc_end,
+            # Capacity extrapolated to 0-100 %, only meaningful over a wide SOC span
+            "capacity_mAh": charge_mah / (soc_span / 100.0) if soc_span >= 5.0 else None,
+            "voltage_min": self.voltage_min,
+            "voltage_max": self.voltage_max,
+            "peak_current_A": self.peak_current,
+        }
+
+
+class CpuLoad:
+    """`stress --cpu N`, the same load generator the full-load test installs."""
+
+    def __init__(self, workers):
+        self.workers = workers
+        self.process = None
+
+    def start(self):
+        if self.workers <= 0 or self.process is not None:
+            return
+        if shutil.which("stress") is None:
+            raise RuntimeError("stress not installed (sudo apt install stress)")
+        # Own process group, so the workers go away with it
+        self.process = subprocess.Popen(["stress", "--cpu", str(self.workers)],
+                                        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                                        start_new_session=True)
+        print(f"CPU load started: stress --cpu {self.workers}")
+
+    def stop(self):
+        if self.process is None:
+            return
+        try:
+            os.killpg(self.process.pid, signal.SIGTERM)
+            self.process.wait(timeout=5)
+        except ProcessLookupError:
+            # The group is already gone, only reap stress
+            self.process.wait()
+        except subprocess.TimeoutExpired:
+            try:
+                os.killpg(self.process.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+            self.process.wait()
+        self.process = None
+        print("CPU load stopped")
+
+
+class CycleTest:
+    """Sampler sink driving discharge and/or charge phases and detecting their endpoints.
+
+    A phase starts once current flows in its direction and ends when the
+    endpoint condition has held for `hold` seconds, so load transients and
+    charger handshakes do not end it early.
+    """
+
+    def __init__(self, phases, load, end_soc=DEFAULT_END_SOC, end_voltage=None,
+                 full_current=DEFAULT_FULL_CURRENT, hold=DEFAULT_HOLD):
+        self.phases = list(phases)
+        self.load = load
+        self.end_soc = end_soc
+        self.end_voltage = end_voltage
+        self.full_current = full_current
+        self.hold = hold
+        self.results = {}
+        self.phase = None
+        self.meter = None
+        self.started = False
+        self.endpoint_since = None
+        self._next_phase()
+
+    def _next_phase(self):
+        self.phase = self.phases.pop(0) if self.phases else None
+        self.meter = CycleMeter()
+        self.started = False
+        self.endpoint_since = None
+        if self.phase == "discharge":
+            self.load.start()
+            print("Discharge phase: unplug the charger to start")
+        elif self.phase == "charge":
+            self.load.stop()
+            print("Charge phase: plug in the charger to start")
+
+    def _at_endpoint(self, voltage, soc, current):
+        if self.phase == "discharge":
+            return soc <= self.end_soc or (self.end_voltage is not None and voltage <= self.end_voltage)
+        return soc >= 100.0 and current < self.full_current
+
+    def __call__(self, sampler, timestamp, block, values):
+        if self.phase is None:
+            return
+        voltage, soc, temp, current = values
+        if not self.started:
+            flowing = current < -IDLE_CURRENT if self.phase == "discharge" else current > IDLE_CURRENT
+            if not flowing:
+                return
+            self.started = True
+            print(f"{self.phase.capitalize()} started at {soc:.1f}% / {voltage:.3f} V")
+        self.meter.add(timestamp, voltage, soc, current)
+        if not self._at_endpoint(voltage, soc, current):
+            self.endpoint_since = None
+            return
+        if self.endpoint_since is None:
+            self.endpoint_since = timestamp
+        if timestamp - self.endpoint_since >= self.hold:
+            self.results[self.phase] = self.meter.result()
+            print(f"{self.phase.capitalize()} endpoint reached at {soc:.1f}% / {voltage:.3f} V")
+            self._next_phase()
+            if self.phase is None:
+                sampler.stop()
+
+    def finish(self):
+        # Record a phase cut short by timeout or Ctrl+C as incomplete
+        if self.phase is not None and self.started:
+            result = self.meter.result()
+            result["incomplete"] = True
+            self.results[self.phase] = result
+        self.load.stop()
+
+
+def print_progress(test):
+    def report(sampler):
+        if sampler.latest is None or test.phase is None:
+            return
+        voltage, soc, temp, current = sampler.latest[1]
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        status = test.phase if test.started else f"waiting for {test.phase}"
+        print(f"[{timestamp}] {status}: {voltage:.3f} V  {soc:.1f}%  {temp:.1f} C  {current:.3f} A  "
+              f"{abs(test.meter.charge_as) / 3.6:.0f} mAh  {abs(test.meter.energy_j) / 3600.0:.2f} Wh")
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure battery capacity over a CW2217 charge/discharge cycle")
+    parser.add_argument("--unit", required=True, help="unit name or serial, used for the trace directory")
+    parser.add_argument("--mode", choices=("discharge", "charge", "cycle"), default="discharge",
+                        help="cycle is a discharge followed by a charge")
+    parser.add_argument("--load", type=int, default=DEFAULT_LOAD, help="stress CPU workers, 0 for no load")
+    parser.add_argument("--rate", type=float, default=DEFAULT_RATE, help="samples per second")
+    parser.add_argument("--end-soc", type=float, default=DEFAULT_END_SOC, help="discharge endpoint in %%")
+    parser.add_argument("--end-voltage", type=float, default=None, help="discharge endpoint pack voltage")
+    parser.add_argument("--full-current", type=float, default=DEFAULT_FULL_CURRENT,
+                        help="charge taper current in amps that ends the charge at 100%%")
+    parser.add_argument("--hold", type=float, default=DEFAULT_HOLD,
+                        help="seconds an endpoint condition must hold")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT_HOURS, help="give up after this many hours")
+    parser.add_argument("--log-dir", default="cycle_logs", help="directory for per-unit traces and results")
+    args = parser.parse_args()
+
+    phases = ("discharge", "charge") if args.mode == "cycle" else (args.mode,)
+    trace_dir = os.path.join(args.log_dir, args.unit)
+    load = CpuLoad(args.load)
+    trace = None
+    test = None
+    try:
+        bus = smbus.SMBus(I2C_BUS)
+        ensure_initialized(bus)
+        sampler = Sampler(bus, rate=args.rate, history=HISTORY)
+        trace = BinaryLogWriter(trace_dir, compress="gzip")
+        sampler.add_sink(trace)
+        test = CycleTest(phases, load, args.end_soc, args.end_voltage, args.full_current, args.hold)
+        sampler.add_sink(test)
+        print(f"Sampling at {args.rate:g} Hz, raw trace in {trace_dir}")
+        sampler.run(duration=args.timeout * 3600, report_interval=REPORT_INTERVAL, on_report=print_progress(test))
+        if test.phase is not None:
+            print(f"Timed out after {args.timeout:g} h in the {test.phase} phase")
+    except KeyboardInterrupt:
+        print("\nStopped by user")
+    except Exception as e:
+        print(f"Cycle test failed: {e}")
+    finally:
+        if test is not None:
+            test.finish()
+        load.stop()
+        if trace is not None:
+            trace.close()
+
+    if test is None:
+        raise SystemExit(1)
+    result = {"unit": args.unit, "mode": args.mode, "trace": os.path.abspath(trace_dir),
+              "phases": test.results}
+    for phase, r in test.results.items():
+        capacity = f"{r['capacity_mAh']:.0f} mAh" if r["capacity_mAh"] is not None else "n/a"
+        print(f"{args.unit} {phase}{' (incomplete)' if r.get('incomplete') else ''}: "
+              f"{r['charge_mAh']:.0f} mAh  {r['energy_Wh']:.2f} Wh  in {r['duration_h']:.2f} h  "
+              f"SOC {r['soc_start']:.1f}% -> {r['soc_end']:.1f}%  (full-scale capacity {capacity})")
+    with open(os.path.join(trace_dir, "result.json"), "w") as f:
+        json.dump(result, f, indent=2)
+    print("RESULT " + json.dumps(result))
+    complete = len(test.results) == len(phases) and not any(r.get("incomplete") for r in test.results.values())
+    raise SystemExit(0 if complete else 1)
+
+
+if __name__ == "__main__":
+    main()
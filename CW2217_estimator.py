@@ -0,0 +1,123 @@
+import math
+
+DEFAULT_WINDOW = 600.0
+DEFAULT_CURRENT_TAU = 30.0
+IDLE_CURRENT = 0.05
+INITIAL_COVARIANCE = 1e4
+CONFIDENCE_SIGMA = 2.0
+MIN_UPDATES = 10
+
+
+class RuntimeEstimator:
+    """Online time-to-empty / time-to-full estimate from CW2217 samples.
+
+    Current is smoothed with an exponential moving average (time constant
+    `current_tau`), which decides whether the battery is charging,
+    discharging or idle. SOC is tracked by recursive least squares on a
+    local linear model soc(t) = level + slope * (t - t_now) with
+    exponential forgetting over `window` seconds. Each update costs O(1)
+    regardless of sample history, and the slope covariance gives the
+    confidence band.
+    """
+
+    def __init__(self, window=DEFAULT_WINDOW, current_tau=DEFAULT_CURRENT_TAU,
+                 idle_current=IDLE_CURRENT, capacity_mah=None):
+        self.window = window
+        self.current_tau = current_tau
+        self.idle_current = idle_current
+        self.capacity_mah = capacity_mah
+        self.reset()
+
+    def reset(self):
+        self.last_time = None
+        self.level = 0.0
+        self.slope = 0.0
+        # Covariance of (level, slope), stored as its three distinct entries
+        self.p00 = self.p01 = self.p11 = 0.0
+        self.noise = 0.0
+        self.current = 0.0
+        self.updates = 0
+
+    def update(self, timestamp, soc, current):
+        if self.last_time is None:
+            self.last_time = timestamp
+            self.level = soc
+            self.p00 = self.p11 = INITIAL_COVARIANCE
+            self.current = current
+            self.updates = 1
+            return
+        dt = timestamp - self.last_time
+        if dt <= 0:
+            return
+        self.last_time = timestamp
+
+        alpha = 1.0 - math.exp(-dt / self.current_tau)
+        self.current += alpha * (current - self.current)
+
+        # Move the model origin to the new sample time: level += slope * dt
+        self.level += self.slope * dt
+        p00 = self.p00 + 2 * dt * self.p01 + dt * dt * self.p11
+        p01 = self.p01 + dt * self.p11
+        p11 = self.p11
+
+        # RLS step with regressor (1, 0) and forgetting factor for this interval
+        lam = math.exp(-dt / self.window)
+        error = soc - self.level
+        gain = lam + p00
+        k0 = p00 / gain
+        k1 = p01 / gain
+        self.level += k0 * error
+        self.slope += k1 * error
+        self.p00 = (p00 - k0 * p00) / lam
+        self.p01 = (p01 - k0 * p01) / lam
+        self.p11 = (p11 - k1 * p01) / lam
+        self.noise = lam * self.noise + (1.0 - lam) * error * error
+        self.updates += 1
+
+    def state(self):
+        if self.current > self.idle_current:
+            return "charging"
+        if self.current < -self.idle_current:
+            return "discharging"
+        return "idle"
+
+    def _runtime(self, remaining, rate):
+        # remaining (% SOC) / rate (% per second), or None when not heading that way
+        return remaining / rate if rate > 0 else None
+
+    def estimate(self):
+        """Return the current estimate as a dict; times are in seconds, None when unknown."""
+        result = {
+            "state": self.state(),
+            "soc": self.level,
+            "slope_pct_per_hour": self.slope * 3600.0,
+            "current_avg": self.current,
+            "time_to_empty": None, "time_to_empty_low": None, "time_to_empty_high": None,
+            "time_to_full": None, "time_to_full_low": None, "time_to_full_high": None,
+        }
+        if self.updates < MIN_UPDATES:
+            return result
+        soc = min(max(self.level, 0.0), 100.0)
+        sigma = math.sqrt(max(self.p11 * self.noise, 0.0))
+        fast = abs(self.slope) + CONFIDENCE_SIGMA * sigma
+        slow = abs(self.slope) - CONFIDENCE_SIGMA * sigma
+        if result["state"] == "discharging" and self.slope < 0:
+            result["time_to_empty"] = self._runtime(soc, -self.slope)
+            result["time_to_empty_low"] = self._runtime(soc, fast)
+            result["time_to_empty_high"] = self._runtime(soc, slow)
+        elif result["state"] == "charging" and self.slope > 0:
+            result["time_to_full"] = self._runtime(100.0 - soc, self.slope)
+            result["time_to_full_low"] = self._runtime(100.0 - soc, fast)
+            result["time_to_full_high"] = self._runtime(100.0 - soc, slow)
+        if self.capacity_mah and result["state"] == "discharging":
+            # Coulomb-based cross-check, useful before the SOC slope has settled
+            remaining_mah = soc / 100.0 * self.capacity_mah
+            result["time_to_empty_current"] = remaining_mah / (-self.current * 1000.0) * 3600.0
+        return result
+
+
+def format_duration(seconds):
+    if seconds is None:
+        return "--"
+    minutes = int(seconds // 60)
+    return f"{minutes // 60}h{minutes % 60:02d}m"
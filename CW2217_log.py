@@ -0,0 +1,262 @@
+import argparse
+import gzip
+import mmap
+import os
+import struct
+import threading
+import time
+from datetime import datetime
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+MAGIC = b"CW2217L1"
+VERSION = 1
+# magic, version, record size, segment start (wall clock), padded to one record
+HEADER = struct.Struct("<8sHHd12x")
+# wall-clock time, raw VCELL, raw SOC, raw TEMP, raw CURRENT, then decoded voltage/soc/temp/current
+RECORD = struct.Struct("<dHHBxhffff")
+RECORD_FIELDS = ("time", "vcell_raw", "soc_raw", "temp_raw", "current_raw",
+                 "voltage", "soc", "temp", "current")
+SEGMENT_SUFFIX = ".bin"
+COMPRESSED_SUFFIXES = {"gzip": ".gz", "zstd": ".zst"}
+DEFAULT_PREFIX = "cw2217"
+DEFAULT_MAX_BYTES = 16 * 1024 * 1024
+DEFAULT_MAX_AGE = 24 * 3600
+DEFAULT_FLUSH_EVERY = 64
+
+
+def raw_words(block):
+    # Offsets into the 0x02-0x0F block returned by CW2217.read_registers()
+    vcell = (block[0] << 8) | block[1]
+    soc = (block[2] << 8) | block[3]
+    temp = block[4]
+    current = int.from_bytes(bytes(block[12:14]), byteorder='big', signed=True)
+    return vcell, soc, temp, current
+
+
+def compress_segment(path, method):
+    target = path + COMPRESSED_SUFFIXES[method]
+    with open(path, "rb") as src, open(target + ".tmp", "wb") as dst:
+        if method == "zstd":
+            zstandard.ZstdCompressor(level=10).copy_stream(src, dst)
+        else:
+            with gzip.GzipFile(fileobj=dst, mode="wb", compresslevel=6) as gz:
+                while True:
+                    chunk = src.read(1 << 20)
+                    if not chunk:
+                        break
+                    gz.write(chunk)
+    os.replace(target + ".tmp", target)
+    os.remove(path)
+    return target
+
+
+class BinaryLogWriter:
+    """Sampler sink writing fixed-width records into rotating segment files.
+
+    Records are packed into a buffer and written every `flush_every` samples.
+    A segment is closed once it reaches `max_bytes` or `max_age` seconds, and
+    closed segments are compressed in a background thread if `compress` is set.
+    """
+
+    def __init__(self, directory, prefix=DEFAULT_PREFIX, max_bytes=DEFAULT_MAX_BYTES,
+                 max_age=DEFAULT_MAX_AGE, compress=None, flush_every=DEFAULT_FLUSH_EVERY):
+        if compress == "zstd" and zstandard is None:
+            print("zstandard module not installed, compressing segments with gzip")
+            compress = "gzip"
+        if compress not in (None, "gzip", "zstd"):
+            raise ValueError(f"Unknown compression {compress!r}")
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.prefix = prefix
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.compress = compress
+        self.flush_every = flush_every
+        self.buffer = bytearray(RECORD.size * flush_every)
+        self.pending = 0
+        self.file = None
+        self.path = None
+        self.size = 0
+        self.opened = 0.0
+        self.compressors = []
+
+    def _open_segment(self, now):
+        # Millisecond names keep segments in chronological order when sorted by name
+        started = datetime.fromtimestamp(now).strftime("%Y%m%d-%H%M%S-%f")[:-3]
+        stem = os.path.join(self.directory, f"{self.prefix}-{started}")
+        self.path = stem + SEGMENT_SUFFIX
+        serial = 1
+        # Never append to an earlier segment, it may already be being compressed
+        while any(os.path.exists(self.path + s) for s in ("",) + tuple(COMPRESSED_SUFFIXES.values())):
+            self.path = f"{stem}-{serial}{SEGMENT_SUFFIX}"
+            serial += 1
+        self.file = open(self.path, "wb")
+        self.file.write(HEADER.pack(MAGIC, VERSION, RECORD.size, now))
+        self.size = self.file.tell()
+        self.opened = now
+
+    def _close_segment(self):
+        self.flush()
+        self.file.close()
+        self.file = None
+        if self.compress:
+            worker = threading.Thread(target=compress_segment, args=(self.path, self.compress), daemon=True)
+            worker.start()
+            self.compressors = [t for t in self.compressors if t.is_alive()] + [worker]
+
+    def write(self, timestamp, block, values):
+        if self.file is None:
+            self._open_segment(timestamp)
+        elif self.size >= self.max_bytes or timestamp - self.opened >= self.max_age:
+            self._close_segment()
+            self._open_segment(timestamp)
+        RECORD.pack_into(self.buffer, self.pending * RECORD.size, timestamp, *raw_words(block), *values)
+        self.pending += 1
+        self.size += RECORD.size
+        if self.pending >= self.flush_every:
+            self.flush()
+
+    def __call__(self, sampler, timestamp, block, values):
+        # Sampler timestamps are monotonic; segments are indexed by wall-clock time
+        self.write(time.time(), block, values)
+
+    def flush(self):
+        if self.file is None or not self.pending:
+            return
+        self.file.write(memoryview(self.buffer)[:self.pending * RECORD.size])
+        self.file.flush()
+        self.pending = 0
+
+    def close(self):
+        if self.file is not None:
+            self._close_segment()
+        for worker in self.compressors:
+            worker.join()
+        self.compressors = []
+
+
+class BinaryLogReader:
+    """Random access to one segment; plain segments are memory-mapped, compressed ones decompressed."""
+
+    def __init__(self, path):
+        self.path = path
+        self.map = None
+        if path.endswith(SEGMENT_SUFFIX):
+            with open(path, "rb") as f:
+                if os.fstat(f.fileno()).st_size > HEADER.size:
+                    self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                    self.data = self.map
+                else:
+                    self.data = f.read()
+        elif path.endswith(COMPRESSED_SUFFIXES["gzip"]):
+            with gzip.open(path, "rb") as f:
+                self.data = f.read()
+        elif path.endswith(COMPRESSED_SUFFIXES["zstd"]):
+            if zstandard is None:
+                raise RuntimeError("zstandard module not installed, cannot read " + path)
+            with open(path, "rb") as f:
+                self.data = zstandard.ZstdDecompressor().stream_reader(f).read()
+        else:
+            raise ValueError(f"Not a CW2217 log segment: {path}")
+        if len(self.data) < HEADER.size:
+            raise ValueError(f"{path}: truncated header")
+        magic, version, record_size, self.start = HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC or version != VERSION or record_size != RECORD.size:
+            raise ValueError(f"{path}: unsupported log format")
+        # A partially written last record (power loss) is ignored
+        self.count = (len(self.data) - HEADER.size) // RECORD.size
+
+    def __len__(self):
+        return self.count
+
+    def timestamp(self, index):
+        return struct.unpack_from("<d", self.data, HEADER.size + index * RECORD.size)[0]
+
+    def record(self, index):
+        return RECORD.unpack_from(self.data, HEADER.size + index * RECORD.size)
+
+    def find(self, timestamp):
+        """Index of the first record at or after `timestamp` (binary search, no scan)."""
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.timestamp(mid) < timestamp:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def records(self, start=None, end=None):
+        first = 0 if start is None else self.find(start)
+        last = self.count if end is None else self.find(end)
+        for index in range(first, last):
+            yield self.record(index)
+
+    def to_numpy(self):
+        """Zero-copy structured NumPy view of all records."""
+        import numpy as np
+        dtype = np.dtype({
+            "names": list(RECORD_FIELDS),
+            "formats": ["<f8", "<u2", "<u2", "u1", "<i2", "<f4", "<f4", "<f4", "<f4"],
+            "offsets": [0, 8, 10, 12, 14, 16, 20, 24, 28],
+            "itemsize": RECORD.size,
+        })
+        return np.frombuffer(self.data, dtype=dtype, count=self.count, offset=HEADER.size)
+
+    def close(self):
+        self.data = None
+        if self.map is not None:
+            self.map.close()
+            self.map = None
+
+
+def list_segments(path):
+    """Segment files for a file or log directory, oldest first."""
+    if os.path.isfile(path):
+        return [path]
+    suffixes = (SEGMENT_SUFFIX,) + tuple(SEGMENT_SUFFIX + s for s in COMPRESSED_SUFFIXES.values())
+    return sorted(os.path.join(path, name) for name in os.listdir(path) if name.endswith(suffixes))
+
+
+def parse_time(text):
+    try:
+        return float(text)
+    except ValueError:
+        return datetime.strptime(text, "%Y-%m-%d %H:%M:%S").timestamp()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Read CW2217 binary telemetry logs")
+    parser.add_argument("path", help="segment file or log directory")
+    parser.add_argument("--start", type=parse_time, default=None, help="'YYYY-mm-dd HH:MM:SS' or epoch seconds")
+    parser.add_argument("--end", type=parse_time, default=None, help="'YYYY-mm-dd HH:MM:SS' or epoch seconds")
+    parser.add_argument("--summary", action="store_true", help="only print segment record counts and spans")
+    args = parser.parse_args()
+
+    for segment in list_segments(args.path):
+        reader = BinaryLogReader(segment)
+        try:
+            if not len(reader):
+                continue
+            first, last = reader.timestamp(0), reader.timestamp(len(reader) - 1)
+            if args.summary:
+                print(f"{segment}: {len(reader)} records, "
+                      f"{datetime.fromtimestamp(first):%Y-%m-%d %H:%M:%S} - "
+                      f"{datetime.fromtimestamp(last):%Y-%m-%d %H:%M:%S}")
+                continue
+            if (args.end is not None and first >= args.end) or (args.start is not None and last < args.start):
+                continue
+            for record in reader.records(args.start, args.end):
+                t, _, _, _, _, voltage, soc, temp, current = record
+                timestamp = datetime.fromtimestamp(t).strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+                print(f"{timestamp}  {voltage:.3f} V  {soc:.2f}%  {temp:.1f} C  {current:.3f} A")
+        finally:
+            reader.close()
+
+
+if __name__ == "__main__":
+    main()
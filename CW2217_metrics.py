@@ -0,0 +1,116 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_PORT = 9217
+DEFAULT_BIND = "0.0.0.0"
+READ_LATENCY_BUCKETS = (0.0005, 0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.25)
+CPU_THERMAL_PATH = "/sys/class/thermal/thermal_zone0/temp"
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus sense, updated in O(buckets)."""
+
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.total += value
+        self.count += 1
+
+    def render(self, name, help_text):
+        lines = [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{le="{bound:g}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{le="+Inf"}} {cumulative + self.counts[-1]}')
+        lines.append(f"{name}_sum {self.total:.6f}")
+        lines.append(f"{name}_count {self.count}")
+        return lines
+
+
+def _metric(lines, name, kind, help_text, value):
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} {kind}")
+    lines.append(f"{name} {value}")
+
+
+def read_cpu_temperature(path=CPU_THERMAL_PATH):
+    try:
+        with open(path) as f:
+            return int(f.read().strip()) / 1000.0
+    except (OSError, ValueError):
+        return None
+
+
+def render_metrics(sampler):
+    """Prometheus text exposition of the sampler's in-memory state; never touches the bus."""
+    lines = []
+    latest = sampler.latest
+    if latest is not None:
+        timestamp, (voltage, soc, temp, current) = latest
+        _metric(lines, "cw2217_voltage_volts", "gauge", "Battery pack voltage.", f"{voltage:.4f}")
+        _metric(lines, "cw2217_soc_percent", "gauge", "Battery state of charge.", f"{soc:.3f}")
+        _metric(lines, "cw2217_temperature_celsius", "gauge", "Fuel gauge temperature.", f"{temp:.1f}")
+        _metric(lines, "cw2217_current_amperes", "gauge", "Battery current, positive when charging.",
+                f"{current:.4f}")
+        _metric(lines, "cw2217_sample_age_seconds", "gauge", "Time since the last good sample.",
+                f"{time.monotonic() - timestamp:.3f}")
+    _metric(lines, "cw2217_samples_total", "counter", "Samples read from the fuel gauge.", sampler.samples)
+    _metric(lines, "cw2217_i2c_errors_total", "counter", "Failed I2C reads of the fuel gauge.", sampler.errors)
+    _metric(lines, "cw2217_sample_rate_hz", "gauge", "Target sampling rate.", f"{sampler.rate:g}")
+    _metric(lines, "cw2217_effective_sample_rate_hz", "gauge", "Sampling rate achieved over the last 5 s.",
+            f"{sampler.effective_rate():.2f}")
+    estimate = sampler.estimator.estimate()
+    for name in ("time_to_empty", "time_to_full"):
+        for suffix, description in (("", "estimate"), ("_low", "lower bound"), ("_high", "upper bound")):
+            value = estimate[name + suffix]
+            if value is not None:
+                _metric(lines, f"cw2217_{name}{suffix}_seconds", "gauge",
+                        f"Predicted {name.replace('_', ' ')}, {description}.", f"{value:.0f}")
+    lines.extend(sampler.read_latency.render("cw2217_read_latency_seconds",
+                                             "Duration of one fuel gauge register read."))
+    cpu_temp = read_cpu_temperature()
+    if cpu_temp is not None:
+        _metric(lines, "cpu_temperature_celsius", "gauge", "SoC temperature from thermal_zone0.",
+                f"{cpu_temp:.1f}")
+    return "\n".join(lines) + "\n"
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    sampler = None
+
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        body = render_metrics(self.sampler).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_metrics_server(sampler, port=DEFAULT_PORT, bind=DEFAULT_BIND):
+    """Serve /metrics for `sampler` from a daemon thread and return the server."""
+    handler = type("SamplerMetricsHandler", (MetricsHandler,), {"sampler": sampler})
+    server = ThreadingHTTPServer((bind, port), handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, name="cw2217-metrics", daemon=True)
+    thread.start()
+    return server
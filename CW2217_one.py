@@ -1,132 +1,155 @@
 import smbus
 import time
-import os
+import sys
+import json
+import argparse
+import statistics
 from datetime import datetime 
-import subprocess
 
-I2C_BUS = 1  
-CW2217_ADDRESS = 0x64  
-VCELL_HIGH_REG = 0x02  
-VCELL_LOW_REG = 0x03  
-SOC_HIGH_REG = 0x04  
-SOC_LOW_REG = 0x05 
-TEMP_REG = 0x06 
-VERSION_REG = 0x00  
-CONTROL_REG = 0x08  
-CURRENT_MSB_REG = 0x0E
-CURRENT_LSB_REG = 0x0F
-R_SENSE = 10.0
+from CW2217 import I2C_BUS, decode_registers, ensure_initialized, read_registers
 
-def check_initialization(bus):
-    try:
-        
-        control_val = bus.read_byte_data(CW2217_ADDRESS, CONTROL_REG)
-        print(f"CONTROL_REG (0x08) value: 0x{control_val:02X}")
-        
-   
-        reg_0x0b_val = bus.read_byte_data(CW2217_ADDRESS, 0x0B)
-        print(f"Register 0x0B value: 0x{reg_0x0b_val:02X}")
+BURST_SAMPLES = 6
+# Back-to-back reads return the same gauge conversion over and over, so
+# samples are spaced to land in different update periods; 6 samples finish in ~1.5 s
+SAMPLE_INTERVAL = 0.3
+OUTLIER_SIGMA = 3.0
+# A single glitched read is tolerated, more fail the field
+MAX_OUTLIERS = 1
+FIELDS = ("voltage", "soc", "temp", "current")
+UNITS = {"voltage": "V", "soc": "%", "temp": "C", "current": "A"}
+# (min mean, max mean, max stddev) per field
+LIMITS = {
+    "voltage": (9.0, 12.75, 0.05),
+    "soc": (0.5, 100.0, 1.0),
+    "temp": (0.0, 60.0, 1.0),
+    "current": (-5.0, 5.0, 0.5),
+}
 
-        return control_val != 0x00 or reg_0x0b_val != 0x80
-    except Exception as e:
-        print(f"Error reading registers: {e}")
-
-        return True
+def burst_read(bus, samples, interval=SAMPLE_INTERVAL):
+    values = {name: [] for name in FIELDS}
+    errors = 0
+    next_read = time.monotonic()
+    for i in range(samples):
+        if i:
+            next_read += interval
+            delay = next_read - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+        try:
+            sample = decode_registers(read_registers(bus))
+        except Exception as e:
+            print(f"Read failed: {e}")
+            errors += 1
+            continue
+        for name, value in zip(FIELDS, sample):
+            values[name].append(value)
+    return values, errors
 
+def find_outliers(data, outlier_sigma, min_deviation):
+    # Each sample against the mean and stddev of the others, since with a
+    # handful of samples a glitch inflates the overall stddev too much to
+    # ever exceed 3 sigma. Deviations within the field's stddev limit are not
+    # glitches, which also covers runs of identical readings.
+    outliers = []
+    for i, value in enumerate(data):
+        others = data[:i] + data[i + 1:]
+        if len(others) < 2:
+            break
+        mean = statistics.fmean(others)
+        if abs(value - mean) > max(outlier_sigma * statistics.pstdev(others, mean), min_deviation):
+            outliers.append(value)
+    return outliers
 
-def initialize_cw2217(bus):
-    try:
-        bus.write_byte_data(CW2217_ADDRESS, CONTROL_REG, 0xF0)
-        time.sleep(0.5)
-        bus.write_byte_data(CW2217_ADDRESS, CONTROL_REG, 0x30)
-        time.sleep(0.5)  
-        bus.write_byte_data(CW2217_ADDRESS, CONTROL_REG, 0x00)
-        time.sleep(0.5)  
-        
-        bus.write_byte_data(CW2217_ADDRESS, 0x0b, 0x80)
-        time.sleep(0.5)  
-        print("CW2217 initialized successfully")
-    except Exception as e:
-        print(f"Initialization failed: {e}")
+def evaluate(values, errors, limits=LIMITS, outlier_sigma=OUTLIER_SIGMA, max_outliers=MAX_OUTLIERS):
+    result = {"passed": errors == 0, "samples": len(values["voltage"]), "errors": errors, "fields": {}}
+    for name in FIELDS:
+        data = values[name]
+        low, high, max_stdev = limits[name]
+        if not data:
+            result["fields"][name] = {"passed": False, "reason": "no samples"}
+            result["passed"] = False
+            continue
+        mean = statistics.fmean(data)
+        stdev = statistics.pstdev(data, mean)
+        outliers = find_outliers(data, outlier_sigma, max_stdev)
+        reasons = []
+        if not low <= mean <= high:
+            reasons.append(f"mean {mean:.3f} outside [{low}, {high}]")
+        if stdev > max_stdev:
+            reasons.append(f"stddev {stdev:.3f} > {max_stdev}")
+        if len(outliers) > max_outliers:
+            reasons.append(f"{len(outliers)} outliers > {max_outliers}")
+        result["fields"][name] = {
+            "mean": mean, "stdev": stdev, "min": min(data), "max": max(data),
+            "outliers": len(outliers), "passed": not reasons, "reason": "; ".join(reasons),
+        }
+        if reasons:
+            result["passed"] = False
+    return result
 
-def read_data(bus):
+def parse_limit(text):
     try:
-         
-        vcell_high = bus.read_byte_data(CW2217_ADDRESS, VCELL_HIGH_REG)
-        vcell_low = bus.read_byte_data(CW2217_ADDRESS, VCELL_LOW_REG)
-        voltage = ((((vcell_high << 8) | vcell_low) & 0x3FFF) * 0.0003125)*3
-
-        
-        soc_high = bus.read_byte_data(CW2217_ADDRESS, SOC_HIGH_REG)
-        soc_low = bus.read_byte_data(CW2217_ADDRESS, SOC_LOW_REG)
-        soc_raw = soc_high + (soc_low / 256.0)
-        soc = min(max(soc_raw, 0.0), 100.0)
-
-        
-        temp = bus.read_byte_data(CW2217_ADDRESS, TEMP_REG)
-        temp_c = -40 + (temp / 2)
+        name, bounds = text.split("=", 1)
+        low, high, max_stdev = (float(v) for v in bounds.split(":"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected field=min:max:stddev, got {text!r}")
+    if name not in LIMITS:
+        raise argparse.ArgumentTypeError(f"unknown field {name!r}, expected one of {', '.join(FIELDS)}")
+    return name, (low, high, max_stdev)
 
-        
-        current_msb = bus.read_byte_data(CW2217_ADDRESS, CURRENT_MSB_REG)
-        current_lsb = bus.read_byte_data(CW2217_ADDRESS, CURRENT_LSB_REG)
-        raw_current = int.from_bytes([current_msb, current_lsb], byteorder='big', signed=True)
-        current = (52.4 * raw_current) / (32768 * R_SENSE)
-
-        
-        return voltage, soc, temp_c, current
-        
-    except Exception as e:
-        print(f"Read failed: {e}")
-        return None, None, None, None
+def print_result(result, elapsed):
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+    print(f"\n[Time: {timestamp}] {result['samples']} samples in {elapsed * 1000:.0f} ms, "
+          f"{result['errors']} read errors")
+    for name in FIELDS:
+        field = result["fields"][name]
+        status = "OK" if field["passed"] else "FAIL"
+        if "mean" not in field:
+            print(f"{name:<8} {status}: {field['reason']}")
+            continue
+        unit = UNITS[name]
+        line = (f"{name:<8} {status}: mean {field['mean']:.3f} {unit}, stddev {field['stdev']:.4f}, "
+                f"range {field['min']:.3f}..{field['max']:.3f}, outliers {field['outliers']}")
+        if field["reason"]:
+            line += f" ({field['reason']})"
+        print(line)
+    print("-" * 20)
+    print(f"RESULT: {'PASS' if result['passed'] else 'FAIL'}")
+    # Machine-readable verdict for the test GUI
+    print("VERDICT " + json.dumps(result))
 
 def main():
+    parser = argparse.ArgumentParser(description="CW2217 power test: burst read with pass/fail limits")
+    parser.add_argument("--samples", type=int, default=BURST_SAMPLES, help="number of samples in the burst")
+    parser.add_argument("--interval", type=float, default=SAMPLE_INTERVAL,
+                        help="seconds between samples, at least one gauge update period")
+    parser.add_argument("--max-outliers", type=int, default=MAX_OUTLIERS,
+                        help=f"{OUTLIER_SIGMA:g}-sigma outliers allowed per field")
+    parser.add_argument("--limit", type=parse_limit, action="append", default=[],
+                        metavar="FIELD=MIN:MAX:STDDEV", help="override the limits for one field")
+    args = parser.parse_args()
+    limits = dict(LIMITS)
+    limits.update(args.limit)
+
+    passed = False
     try:
         bus = smbus.SMBus(I2C_BUS)
-        if check_initialization(bus):
-            print("CW2217 requires initialization")
-            
-            
-            home_dir = os.path.expanduser("~")
-            power_script = os.path.join(home_dir, "argon-scripts", "Argon_Notebook_Test-main", "power.sh")
-            print(f"Executing power script: {power_script}")
-            try:
-                
-                subprocess.run(['bash', power_script], check=True)
-                print("Power script executed successfully")
-            except subprocess.CalledProcessError as e:
-                print(f"Power script failed with error code: {e.returncode}")
-            except FileNotFoundError:
-                print(f"Script not found at {power_script}")
-            except Exception as e:
-                print(f"Error executing power script: {e}")
-            
-           
-            initialize_cw2217(bus)
-            time.sleep(3)  
-        else:
-            print("CW2217 already initialized, skipping initialization.")
+        ensure_initialized(bus)
         
-        for i in range(3):
-            voltage, soc, temp_c, current = read_data(bus)
-            
-            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
-            
-            if voltage is not None:
-                print(f"\n[Time: {timestamp}]")
-                print(f"Voltage: {voltage:.3f} V")
-                print(f"SOC: {soc:.2f}%")
-                print(f"Temperature: {temp_c:.1f} C")
-                print(f"Current: {current:.3f} A")
-                print("-" * 20)
-            else:
-                print("Failed to read data")
-                
-            time.sleep(1)  
+        start = time.monotonic()
+        values, errors = burst_read(bus, args.samples, args.interval)
+        elapsed = time.monotonic() - start
+        result = evaluate(values, errors, limits, max_outliers=args.max_outliers)
+        print_result(result, elapsed)
+        passed = result["passed"]
             
     except KeyboardInterrupt:
         print("\nStopped by user")
+    except Exception as e:
+        print(f"Power test error: {e}")
     finally:
         print("Program terminated")
+    sys.exit(0 if passed else 1)
 
 if __name__ == "__main__":
     main()
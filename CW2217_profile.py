@@ -0,0 +1,101 @@
+import argparse
+import time
+import zlib
+
+import smbus
+
+I2C_BUS = 1
+CW2217_ADDRESS = 0x64
+PROFILE_REG = 0x10
+PROFILE_SIZE = 80
+SMBUS_BLOCK_MAX = 32
+WRITE_RETRIES = 3
+RETRY_DELAY = 0.05
+
+# Battery profiles as written to 0x10-0x5F, keyed by name
+PROFILES = {
+    "argon_one_up": bytes.fromhex(
+        "32 00 00 00 00 00 00 00 A8 AA BE C6 B8 AE C2 98"
+        "82 FF FF CA 98 75 63 55 4E 4C 49 98 88 DC 34 DB"
+        "D3 D4 D3 D0 CE CB BB E7 A2 C2 C4 AE 96 89 80 74"
+        "67 63 71 8E 9F 85 6F 3B 20 00 AB 10 00 B0 73 00"
+        "00 00 64 08 D3 77 00 00 00 00 00 00 00 00 00 AC"
+    ),
+}
+DEFAULT_PROFILE = "argon_one_up"
+
+
+def profile_checksum(data):
+    return zlib.crc32(bytes(data))
+
+
+def read_profile(bus):
+    profile = []
+    for offset in range(0, PROFILE_SIZE, SMBUS_BLOCK_MAX):
+        length = min(SMBUS_BLOCK_MAX, PROFILE_SIZE - offset)
+        profile.extend(bus.read_i2c_block_data(CW2217_ADDRESS, PROFILE_REG + offset, length))
+    return profile
+
+
+def write_profile(bus, profile):
+    if len(profile) != PROFILE_SIZE:
+        raise ValueError(f"Profile must be {PROFILE_SIZE} bytes, got {len(profile)}")
+    for offset in range(0, PROFILE_SIZE, SMBUS_BLOCK_MAX):
+        chunk = list(profile[offset:offset + SMBUS_BLOCK_MAX])
+        bus.write_i2c_block_data(CW2217_ADDRESS, PROFILE_REG + offset, chunk)
+
+
+def verify_profile(bus, profile):
+    return profile_checksum(read_profile(bus)) == profile_checksum(profile)
+
+
+def load_profile(bus, name=DEFAULT_PROFILE, retries=WRITE_RETRIES):
+    profile = PROFILES[name]
+    for attempt in range(1, retries + 1):
+        try:
+            write_profile(bus, profile)
+            if verify_profile(bus, profile):
+                print(f"Battery profile '{name}' written and verified "
+                      f"(crc32 0x{profile_checksum(profile):08X})")
+                return True
+            print(f"Battery profile read-back mismatch (attempt {attempt}/{retries})")
+        except Exception as e:
+            print(f"Battery profile write failed (attempt {attempt}/{retries}): {e}")
+        time.sleep(RETRY_DELAY)
+    return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write and verify the CW2217 battery profile")
+    parser.add_argument("--profile", default=DEFAULT_PROFILE, choices=sorted(PROFILES))
+    parser.add_argument("--bus", type=int, action="append",
+                        help=f"I2C bus number, repeat for several gauges (default {I2C_BUS})")
+    parser.add_argument("--verify-only", action="store_true", help="only compare the stored profile")
+    args = parser.parse_args()
+
+    failed = 0
+    for bus_number in args.bus or [I2C_BUS]:
+        try:
+            bus = smbus.SMBus(bus_number)
+        except Exception as e:
+            print(f"Bus {bus_number}: cannot open: {e}")
+            failed += 1
+            continue
+        try:
+            if args.verify_only:
+                ok = verify_profile(bus, PROFILES[args.profile])
+                print(f"Bus {bus_number}: profile {'matches' if ok else 'differs'}")
+            else:
+                ok = load_profile(bus, args.profile)
+                print(f"Bus {bus_number}: {'OK' if ok else 'FAILED'}")
+        except Exception as e:
+            print(f"Bus {bus_number}: {e}")
+            ok = False
+        finally:
+            bus.close()
+        failed += not ok
+    raise SystemExit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,373 @@
+import argparse
+import time
+from array import array
+from datetime import datetime
+
+import smbus
+
+from CW2217 import I2C_BUS, decode_registers, ensure_initialized, read_registers
+from CW2217_estimator import DEFAULT_WINDOW, RuntimeEstimator, format_duration
+from CW2217_log import DEFAULT_MAX_AGE, DEFAULT_MAX_BYTES, BinaryLogWriter
+from CW2217_metrics import DEFAULT_BIND, READ_LATENCY_BUCKETS, Histogram, start_metrics_server
+from CW2217_shm import SHM_PATH, TelemetryPublisher
+
+FIELDS = ("voltage", "soc", "temp", "current")
+DEFAULT_RATE = 10.0
+DEFAULT_HISTORY = 3600.0
+MAX_RATE = 100.0
+ADAPTIVE_LOW_RATE = 1.0
+ADAPTIVE_HIGH_RATE = 20.0
+ADAPTIVE_DV = 0.02
+ADAPTIVE_DI = 0.1
+ADAPTIVE_HOLD = 5.0
+ADAPTIVE_DECAY = 0.5
+
+
+class RingBuffer:
+    """Fixed-size sample history backed by preallocated arrays of doubles.
+
+    Samples are stored column-wise (monotonic timestamp plus one column per
+    field in FIELDS) and the oldest sample is overwritten once the buffer is
+    full, so memory use does not grow with run time.
+    """
+
+    def __init__(self, capacity):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self.timestamps = array('d', bytes(8 * capacity))
+        self.columns = {name: array('d', bytes(8 * capacity)) for name in FIELDS}
+        self.head = 0
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def append(self, timestamp, voltage, soc, temp, current):
+        i = self.head
+        self.timestamps[i] = timestamp
+        self.columns["voltage"][i] = voltage
+        self.columns["soc"][i] = soc
+        self.columns["temp"][i] = temp
+        self.columns["current"][i] = current
+        self.head = (i + 1) % self.capacity
+        if self.count < self.capacity:
+            self.count += 1
+
+    def _physical(self, logical):
+        return (self.head - self.count + logical) % self.capacity
+
+    def _first_since(self, since):
+        # Timestamps are monotonic, so binary search in logical (oldest-first) order
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.timestamps[self._physical(mid)] < since:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _slices(self, seconds, now):
+        if self.count == 0:
+            return []
+        if seconds is None:
+            start = 0
+        else:
+            if now is None:
+                now = time.monotonic()
+            start = self._first_since(now - seconds)
+        n = self.count - start
+        if n <= 0:
+            return []
+        begin = self._physical(start)
+        end = begin + n
+        if end <= self.capacity:
+            return [slice(begin, end)]
+        return [slice(begin, self.capacity), slice(0, end - self.capacity)]
+
+    def span(self, seconds=None, now=None):
+        """Return (count, first timestamp, last timestamp) for the last `seconds`, without copying."""
+        slices = self._slices(seconds, now)
+        if not slices:
+            return 0, None, None
+        count = sum(s.stop - s.start for s in slices)
+        return count, self.timestamps[slices[0].start], self.timestamps[slices[-1].stop - 1]
+
+    def last(self, seconds=None, now=None):
+        """Return (timestamps, {field: values}) for the last `seconds`, oldest first."""
+        slices = self._slices(seconds, now)
+        timestamps = array('d')
+        columns = {name: array('d') for name in FIELDS}
+        for s in slices:
+            timestamps.extend(self.timestamps[s])
+            for name in FIELDS:
+                columns[name].extend(self.columns[name][s])
+        return timestamps, columns
+
+    def stats(self, seconds=None, now=None):
+        """Return {field: (min, max, mean)} over the last `seconds`, or None if empty."""
+        slices = self._slices(seconds, now)
+        if not slices:
+            return None
+        n = sum(s.stop - s.start for s in slices)
+        result = {}
+        for name in FIELDS:
+            column = self.columns[name]
+            parts = [column[s] for s in slices]
+            result[name] = (
+                min(min(p) for p in parts),
+                max(max(p) for p in parts),
+                sum(sum(p) for p in parts) / n,
+            )
+        return result
+
+
+class AdaptiveRate:
+    """Picks the sampling rate from signal activity.
+
+    A voltage or current change larger than `dv` / `di` between consecutive
+    samples jumps straight to `high_rate`. After `hold` quiet seconds the rate
+    decays by a factor of `decay` per second until it reaches `low_rate`.
+    """
+
+    def __init__(self, low_rate=ADAPTIVE_LOW_RATE, high_rate=ADAPTIVE_HIGH_RATE, dv=ADAPTIVE_DV,
+                 di=ADAPTIVE_DI, hold=ADAPTIVE_HOLD, decay=ADAPTIVE_DECAY):
+        if not 0 < low_rate <= high_rate <= MAX_RATE:
+            raise ValueError(f"need 0 < low_rate <= high_rate <= {MAX_RATE}")
+        self.low_rate = low_rate
+        self.high_rate = high_rate
+        self.dv = dv
+        self.di = di
+        self.hold = hold
+        self.decay = decay
+        self.rate = low_rate
+        self.previous = None
+        self.last_trigger = None
+
+    def update(self, timestamp, voltage, current):
+        if self.previous is not None:
+            last_time, last_voltage, last_current = self.previous
+            if abs(voltage - last_voltage) > self.dv or abs(current - last_current) > self.di:
+                self.rate = self.high_rate
+                self.last_trigger = timestamp
+            elif self.last_trigger is None or timestamp - self.last_trigger > self.hold:
+                self.rate = max(self.low_rate, self.rate * self.decay ** (timestamp - last_time))
+        self.previous = (timestamp, voltage, current)
+        return self.rate
+
+
+class Sampler:
+    """Polls the CW2217 at a fixed rate and records decoded samples in a RingBuffer."""
+
+    def __init__(self, bus, rate=DEFAULT_RATE, history=DEFAULT_HISTORY, scheduler=None, estimator=None):
+        if not 0 < rate <= MAX_RATE:
+            raise ValueError(f"rate must be in (0, {MAX_RATE}] Hz")
+        self.bus = bus
+        self.scheduler = scheduler
+        self.estimator = estimator if estimator is not None else RuntimeEstimator()
+        if scheduler is not None:
+            rate = scheduler.rate
+        self.rate = rate
+        self.period = 1.0 / rate
+        max_rate = scheduler.high_rate if scheduler is not None else rate
+        self.buffer = RingBuffer(max(1, int(max_rate * history)))
+        self.samples = 0
+        self.errors = 0
+        self.latest = None
+        self.read_latency = Histogram(READ_LATENCY_BUCKETS)
+        self.running = False
+        self.sinks = []
+
+    def add_sink(self, sink):
+        """Register sink(sampler, timestamp, block, values), called after every good sample."""
+        self.sinks.append(sink)
+
+    def sample_once(self):
+        start = time.perf_counter()
+        try:
+            block = read_registers(self.bus)
+        except Exception as e:
+            self.errors += 1
+            print(f"Read failed: {e}")
+            return None
+        finally:
+            self.read_latency.observe(time.perf_counter() - start)
+        timestamp = time.monotonic()
+        values = decode_registers(block)
+        self.buffer.append(timestamp, *values)
+        self.latest = (timestamp, values)
+        self.samples += 1
+        self.estimator.update(timestamp, values[1], values[3])
+        if self.scheduler is not None:
+            self.rate = self.scheduler.update(timestamp, values[0], values[3])
+            self.period = 1.0 / self.rate
+        for sink in self.sinks:
+            sink(self, timestamp, block, values)
+        return values
+
+    def run(self, duration=None, report_interval=1.0, on_report=None):
+        self.running = True
+        start = time.monotonic()
+        next_sample = start
+        next_report = start + report_interval
+        while self.running:
+            self.sample_once()
+            now = time.monotonic()
+            if on_report is not None and now >= next_report:
+                on_report(self)
+                next_report += report_interval
+            if duration is not None and now - start >= duration:
+                break
+            next_sample += self.period
+            if next_sample < now:
+                # Fell behind (bus stall, suspend): resync instead of bursting to catch up
+                next_sample = now + self.period
+            time.sleep(next_sample - now)
+        self.running = False
+
+    def stop(self):
+        self.running = False
+
+    def effective_rate(self, window=5.0):
+        """Samples per second actually recorded over the last `window` seconds."""
+        count, first, last = self.buffer.span(window)
+        if count < 2 or last <= first:
+            return 0.0
+        return (count - 1) / (last - first)
+
+
+class CsvLogger:
+    """Sampler sink that appends samples as CSV rows (see CW2217_analysis.py)."""
+
+    HEADER = "time," + ",".join(FIELDS) + "\n"
+
+    def __init__(self, path, flush_every=100):
+        self.file = open(path, "a", buffering=1 << 16)
+        if self.file.tell() == 0:
+            self.file.write(self.HEADER)
+        self.flush_every = flush_every
+        self.pending = 0
+
+    def __call__(self, sampler, timestamp, block, values):
+        # Wall-clock time so logs from different runs and units line up
+        self.file.write("%.3f,%.5f,%.3f,%.1f,%.5f\n" % ((time.time(),) + tuple(values)))
+        self.pending += 1
+        if self.pending >= self.flush_every:
+            self.file.flush()
+            self.pending = 0
+
+    def close(self):
+        self.file.close()
+
+
+def print_report(sampler):
+    stats = sampler.buffer.stats(seconds=1.0)
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+    if stats is None:
+        print(f"[{timestamp}] no samples (errors: {sampler.errors})")
+        return
+    voltage, soc, temp, current = (stats[name] for name in FIELDS)
+    estimate = sampler.estimator.estimate()
+    if estimate["state"] == "charging":
+        runtime = f"full in {format_duration(estimate['time_to_full'])}"
+    else:
+        runtime = f"empty in {format_duration(estimate['time_to_empty'])}"
+    print(f"[{timestamp}] "
+          f"V {voltage[2]:.3f} ({voltage[0]:.3f}-{voltage[1]:.3f})  "
+          f"SOC {soc[2]:.2f}%  "
+          f"T {temp[2]:.1f} C  "
+          f"I {current[2]:.3f} A ({current[0]:.3f}-{current[1]:.3f})  "
+          f"{estimate['state']}, {runtime}  "
+          f"rate {sampler.effective_rate():.1f} Hz  "
+          f"samples {sampler.samples} errors {sampler.errors}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Long-running CW2217 sampler")
+    parser.add_argument("--rate", type=float, default=DEFAULT_RATE, help="samples per second")
+    parser.add_argument("--adaptive", action="store_true",
+                        help="vary the rate between --low-rate and --high-rate with signal activity")
+    parser.add_argument("--low-rate", type=float, default=ADAPTIVE_LOW_RATE, help="adaptive idle rate")
+    parser.add_argument("--high-rate", type=float, default=ADAPTIVE_HIGH_RATE, help="adaptive active rate")
+    parser.add_argument("--dv", type=float, default=ADAPTIVE_DV,
+                        help="voltage step in volts that switches to the high rate")
+    parser.add_argument("--di", type=float, default=ADAPTIVE_DI,
+                        help="current step in amps that switches to the high rate")
+    parser.add_argument("--hold", type=float, default=ADAPTIVE_HOLD,
+                        help="quiet seconds before the rate starts decaying")
+    parser.add_argument("--history", type=float, default=DEFAULT_HISTORY,
+                        help="seconds of samples kept in memory")
+    parser.add_argument("--duration", type=float, default=None, help="stop after this many seconds")
+    parser.add_argument("--report", type=float, default=1.0, help="seconds between printed summaries")
+    parser.add_argument("--publish", nargs="?", const=SHM_PATH, default=None, metavar="PATH",
+                        help=f"publish the latest sample to shared memory (default {SHM_PATH})")
+    parser.add_argument("--csv", default=None, metavar="PATH", help="append every sample to a CSV log")
+    parser.add_argument("--log-dir", default=None, metavar="DIR", help="write rotating binary log segments")
+    parser.add_argument("--rotate-mb", type=float, default=DEFAULT_MAX_BYTES / (1024 * 1024),
+                        help="start a new log segment after this many MB")
+    parser.add_argument("--rotate-hours", type=float, default=DEFAULT_MAX_AGE / 3600,
+                        help="start a new log segment after this many hours")
+    parser.add_argument("--compress", choices=("gzip", "zstd"), default=None,
+                        help="compress closed log segments")
+    parser.add_argument("--capacity-mah", type=float, default=None,
+                        help="battery capacity, enables a coulomb-based time-to-empty cross-check")
+    parser.add_argument("--estimate-window", type=float, default=DEFAULT_WINDOW,
+                        help="seconds of SOC history weighted by the runtime estimator")
+    parser.add_argument("--metrics-port", type=int, default=None, metavar="PORT",
+                        help="serve Prometheus metrics over HTTP on this port")
+    parser.add_argument("--metrics-bind", default=DEFAULT_BIND, metavar="ADDR",
+                        help=f"address for the metrics endpoint (default {DEFAULT_BIND})")
+    args = parser.parse_args()
+
+    publisher = None
+    csv_logger = None
+    binary_log = None
+    try:
+        bus = smbus.SMBus(I2C_BUS)
+        ensure_initialized(bus)
+        scheduler = None
+        if args.adaptive:
+            scheduler = AdaptiveRate(args.low_rate, args.high_rate, args.dv, args.di, args.hold)
+        estimator = RuntimeEstimator(window=args.estimate_window, capacity_mah=args.capacity_mah)
+        sampler = Sampler(bus, rate=args.rate, history=args.history, scheduler=scheduler, estimator=estimator)
+        if args.publish:
+            try:
+                publisher = TelemetryPublisher(args.publish)
+            except RuntimeError as e:
+                print(f"Cannot publish: {e}")
+                return
+            sampler.add_sink(publisher)
+            print(f"Publishing telemetry to {args.publish}")
+        if args.csv:
+            csv_logger = CsvLogger(args.csv)
+            sampler.add_sink(csv_logger)
+            print(f"Logging samples to {args.csv}")
+        if args.log_dir:
+            binary_log = BinaryLogWriter(args.log_dir, max_bytes=int(args.rotate_mb * 1024 * 1024),
+                                         max_age=args.rotate_hours * 3600, compress=args.compress)
+            sampler.add_sink(binary_log)
+            print(f"Writing binary log segments to {args.log_dir}")
+        if args.metrics_port is not None:
+            start_metrics_server(sampler, args.metrics_port, args.metrics_bind)
+            print(f"Serving metrics on http://{args.metrics_bind}:{args.metrics_port}/metrics")
+        if scheduler is not None:
+            print(f"Sampling at {args.low_rate:g}-{args.high_rate:g} Hz (adaptive), "
+                  f"keeping up to {sampler.buffer.capacity} samples")
+        else:
+            print(f"Sampling at {args.rate:g} Hz, keeping {sampler.buffer.capacity} samples")
+        sampler.run(duration=args.duration, report_interval=args.report, on_report=print_report)
+    except KeyboardInterrupt:
+        print("\nStopped by user")
+    finally:
+        if publisher is not None:
+            publisher.close()
+        if csv_logger is not None:
+            csv_logger.close()
+        if binary_log is not None:
+            binary_log.close()
+        print("Program terminated")
+
+
+if __name__ == "__main__":
+    main()
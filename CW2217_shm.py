@@ -0,0 +1,152 @@
+import fcntl
+import math
+import mmap
+import os
+import struct
+import time
+from datetime import datetime
+
+from CW2217_estimator import format_duration
+
+SHM_PATH = "/dev/shm/cw2217_telemetry"
+MAGIC = b"CW2217T2"
+
+# Layout: magic, sequence counter, then the payload guarded by the counter.
+HEADER = struct.Struct("<8sQ")
+PAYLOAD = struct.Struct("<6d2Q6d")
+SEQ_OFFSET = 8
+PAYLOAD_OFFSET = HEADER.size
+SEGMENT_SIZE = HEADER.size + PAYLOAD.size
+PAYLOAD_FIELDS = ("monotonic", "wall_time", "voltage", "soc", "temp", "current",
+                  "samples", "errors",
+                  "time_to_empty", "time_to_empty_low", "time_to_empty_high",
+                  "time_to_full", "time_to_full_low", "time_to_full_high")
+ESTIMATE_FIELDS = PAYLOAD_FIELDS[8:]
+
+
+class TelemetryPublisher:
+    """Single writer for the telemetry segment.
+
+    The sequence counter is a seqlock: it is odd while the payload is being
+    rewritten and even once it is consistent, so readers never take a lock.
+    The seqlock only works with one writer, so the publisher holds an
+    exclusive flock on the segment and refuses to start while another
+    process has it.
+    """
+
+    def __init__(self, path=SHM_PATH):
+        self.path = path
+        self.fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            try:
+                fcntl.flock(self.fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                raise RuntimeError(f"{path} is already published by another process")
+            os.fchmod(self.fd, 0o644)
+            os.ftruncate(self.fd, SEGMENT_SIZE)
+            self.map = mmap.mmap(self.fd, SEGMENT_SIZE, mmap.MAP_SHARED, mmap.PROT_READ | mmap.PROT_WRITE)
+        except BaseException:
+            os.close(self.fd)
+            raise
+        self.seq = 0
+        HEADER.pack_into(self.map, 0, MAGIC, self.seq)
+
+    def publish(self, monotonic, voltage, soc, temp, current, samples=0, errors=0, estimate=None):
+        # Runtime estimates are seconds, NaN when unknown
+        runtimes = [math.nan if estimate is None or estimate[name] is None else estimate[name]
+                    for name in ESTIMATE_FIELDS]
+        self.seq += 1
+        struct.pack_into("<Q", self.map, SEQ_OFFSET, self.seq)
+        PAYLOAD.pack_into(self.map, PAYLOAD_OFFSET, monotonic, time.time(),
+                          voltage, soc, temp, current, samples, errors, *runtimes)
+        self.seq += 1
+        struct.pack_into("<Q", self.map, SEQ_OFFSET, self.seq)
+
+    def __call__(self, sampler, timestamp, block, values):
+        # Sampler sink signature, see Sampler.add_sink()
+        self.publish(timestamp, *values, samples=sampler.samples, errors=sampler.errors,
+                     estimate=sampler.estimator.estimate())
+
+    def close(self):
+        self.map.close()
+        # Closing the descriptor releases the writer lock
+        os.close(self.fd)
+
+
+class TelemetryReader:
+    """Lock-free reader for the segment written by TelemetryPublisher."""
+
+    def __init__(self, path=SHM_PATH):
+        self.path = path
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            # Empty or short while a publisher is starting, or after one crashed mid-setup
+            size = os.fstat(fd).st_size
+            if size < SEGMENT_SIZE:
+                raise ValueError(f"{path} is {size} bytes, expected a {SEGMENT_SIZE}-byte telemetry segment")
+            self.map = mmap.mmap(fd, SEGMENT_SIZE, mmap.MAP_SHARED, mmap.PROT_READ)
+        finally:
+            os.close(fd)
+        magic, _ = HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC:
+            self.map.close()
+            raise ValueError(f"{path} is not a CW2217 telemetry segment")
+
+    def sequence(self):
+        return struct.unpack_from("<Q", self.map, SEQ_OFFSET)[0]
+
+    def read(self, retries=100):
+        """Return the latest sample as a dict, or None if nothing was published yet."""
+        for _ in range(retries):
+            before = self.sequence()
+            if before & 1:
+                continue
+            payload = PAYLOAD.unpack_from(self.map, PAYLOAD_OFFSET)
+            if self.sequence() == before:
+                if before == 0:
+                    return None
+                sample = dict(zip(PAYLOAD_FIELDS, payload))
+                for name in ESTIMATE_FIELDS:
+                    if math.isnan(sample[name]):
+                        sample[name] = None
+                sample["seq"] = before // 2
+                return sample
+        raise TimeoutError("Telemetry segment kept changing while reading")
+
+    def close(self):
+        self.map.close()
+
+
+def main():
+    try:
+        reader = TelemetryReader()
+    except FileNotFoundError:
+        print(f"No telemetry segment at {SHM_PATH}, start CW2217_sampler.py --publish first")
+        return
+    except (ValueError, OSError) as e:
+        print(f"Cannot read telemetry segment: {e}, start CW2217_sampler.py --publish first")
+        return
+    try:
+        sample = reader.read()
+        if sample is None:
+            print("Telemetry segment is empty")
+            return
+        timestamp = datetime.fromtimestamp(sample["wall_time"]).strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+        print(f"\n[Time: {timestamp}] (sample #{sample['seq']})")
+        print(f"Voltage: {sample['voltage']:.3f} V")
+        print(f"SOC: {sample['soc']:.2f}%")
+        print(f"Temperature: {sample['temp']:.1f} C")
+        print(f"Current: {sample['current']:.3f} A")
+        if sample["time_to_full"] is not None:
+            print(f"Time to full: {format_duration(sample['time_to_full'])} "
+                  f"({format_duration(sample['time_to_full_low'])}-{format_duration(sample['time_to_full_high'])})")
+        if sample["time_to_empty"] is not None:
+            print(f"Time to empty: {format_duration(sample['time_to_empty'])} "
+                  f"({format_duration(sample['time_to_empty_low'])}-{format_duration(sample['time_to_empty_high'])})")
+        print("-" * 20)
+    finally:
+        reader.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,42 +1,206 @@
 from evdev import InputDevice, categorize, ecodes
+import glob
+import os
+import re
 import subprocess
+import threading
+import time
 
-device = InputDevice('/dev/input/event13')
+from latency import LatencyRecorder
 
-def get_current_brightness():
+DEVICE_PATH = '/dev/input/event13'
+BRIGHTNESS_STEP = 10
+MIN_BRIGHTNESS = 10
+MAX_BRIGHTNESS = 100
+DEFAULT_BRIGHTNESS = 50
+BACKLIGHT_GLOB = "/sys/class/backlight/*"
+
+def detect_ddc_bus():
+    """I2C bus number of the first DDC/CI display, or None."""
+    try:
+        output = subprocess.check_output(["ddcutil", "detect", "--brief"], text=True)
+    except Exception as e:
+        print(f"ddc_detect_false: {e}")
+        return None
+    match = re.search(r"/dev/i2c-(\d+)", output)
+    return int(match.group(1)) if match else None
+
+def ddcutil(bus, *args):
+    # --bus skips display detection, which is most of the cost of a ddcutil call
+    command = ["ddcutil"] + (["--bus", str(bus)] if bus is not None else []) + list(args)
+    return subprocess.check_output(command, text=True, stderr=subprocess.STDOUT)
+
+def get_current_brightness(bus=None):
     try:
-        output = subprocess.check_output(["ddcutil", "getvcp", "10"], text=True)
-        value = output.split("=")[-1].split()[0]
-        return int(value)
+        # --brief prints "VCP 10 C <current> <max>"
+        output = ddcutil(bus, "--brief", "getvcp", "10")
+        return int(output.split()[3])
     except Exception as e:
         print(f"get_light_false: {e}")
-        return 50  
-
-def adjust_brightness(delta):
-    global current_brightness  
-    
-    new_value = max(10, min(100, current_brightness + delta))  
-    print(f"ctrl_light: {current_brightness}% -> {new_value}%")
-    subprocess.run(["ddcutil", "setvcp", "10", str(new_value)], check=True)
-    current_brightness = new_value  
-
-try:
-    current_brightness = get_current_brightness()  
-
-    for event in device.read_loop():
-        if event.type == ecodes.EV_KEY:
-            key_event = categorize(event)
-            
-            if key_event.keycode == "KEY_ESC" and event.value == 1:
-                print("\nESC pressed, exiting...")
-                break
-                
-            if event.value == 1:  
-                if key_event.keycode == "KEY_BRIGHTNESSDOWN":
-                    adjust_brightness(-10)
-                elif key_event.keycode == "KEY_BRIGHTNESSUP":
-                    adjust_brightness(10)
-except KeyboardInterrupt:
-    print("\nout")
-finally:
-    device.close()
+        return DEFAULT_BRIGHTNESS
+
+class SysfsBacklight:
+    """Internal panel backlight through /sys/class/backlight, written with a kept-open fd."""
+
+    name = "sysfs"
+    blocking = False
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, "max_brightness")) as f:
+            self.max_raw = int(f.read())
+        self.fd = os.open(os.path.join(path, "brightness"), os.O_RDWR)
+
+    def get(self):
+        raw = int(os.pread(self.fd, 32, 0))
+        return round(raw * 100 / self.max_raw)
+
+    def set(self, percent):
+        os.pwrite(self.fd, str(max(1, round(percent * self.max_raw / 100))).encode(), 0)
+
+    def close(self):
+        os.close(self.fd)
+
+class DdcBacklight:
+    """External monitor brightness (VCP 0x10) over DDC/CI through ddcutil.
+
+    The display's I2C bus is detected once and reused, and re-detected if a
+    call on it fails.
+    """
+
+    name = "ddcutil"
+    blocking = True
+
+    def __init__(self):
+        self.bus = detect_ddc_bus()
+        if self.bus is not None:
+            print(f"DDC display on /dev/i2c-{self.bus}")
+
+    def get(self):
+        return get_current_brightness(self.bus)
+
+    def set(self, percent):
+        try:
+            ddcutil(self.bus, "--noverify", "setvcp", "10", str(percent))
+        except subprocess.CalledProcessError:
+            bus = detect_ddc_bus()
+            if bus is None or bus == self.bus:
+                raise
+            print(f"DDC display moved to /dev/i2c-{bus}")
+            self.bus = bus
+            ddcutil(self.bus, "--noverify", "setvcp", "10", str(percent))
+
+    def close(self):
+        pass
+
+def find_sysfs_backlight():
+    for path in sorted(glob.glob(BACKLIGHT_GLOB)):
+        if not os.access(os.path.join(path, "brightness"), os.W_OK):
+            print(f"{path}/brightness is not writable (add the user to the video group)")
+            continue
+        try:
+            return SysfsBacklight(path)
+        except (OSError, ValueError) as e:
+            print(f"Cannot use {path}: {e}")
+    return None
+
+def open_backlight(kind="auto"):
+    """The internal panel's sysfs backlight if there is one, DDC/CI otherwise."""
+    if kind in ("auto", "sysfs"):
+        backlight = find_sysfs_backlight()
+        if backlight is not None:
+            print(f"Backlight: {backlight.path}")
+            return backlight
+        if kind == "sysfs":
+            raise RuntimeError("no usable sysfs backlight")
+    return DdcBacklight()
+
+class BrightnessControl:
+    """Display brightness through a sysfs or DDC/CI backlight.
+
+    sysfs writes take microseconds and are done inline. For DDC, adjust() only
+    records a target and returns; a worker thread, which exists while there
+    is a target to apply, runs ddcutil with at most one call in flight and
+    always applies the latest target, so presses arriving during a slow DDC
+    transfer collapse into one.
+    """
+
+    def __init__(self, recorder=None, backlight=None):
+        self.recorder = recorder
+        self.lock = threading.Lock()
+        self.backlight = backlight if backlight is not None else open_backlight()
+        self.name = self.backlight.name
+        self.current = self.backlight.get()
+        self.target = self.current
+        self.origin = None
+        self.pending = False
+        self.busy = False
+
+    def adjust(self, delta, event_time=None):
+        with self.lock:
+            base = self.target if self.busy else self.current
+            new_value = max(MIN_BRIGHTNESS, min(MAX_BRIGHTNESS, base + delta))
+            if self.pending and self.recorder is not None:
+                self.recorder.coalesced(f"brightness:{self.name}")
+            self.target = new_value
+            self.origin = event_time if event_time is not None else time.time()
+            self.pending = True
+            if self.busy:
+                return
+            self.busy = True
+        if self.backlight.blocking:
+            threading.Thread(target=self._apply, daemon=True).start()
+        else:
+            self._apply()
+
+    def _apply(self):
+        while True:
+            with self.lock:
+                if not self.pending:
+                    self.busy = False
+                    return
+                target = self.target
+                event_time = self.origin
+                self.pending = False
+            if target == self.current:
+                continue
+            print(f"ctrl_light: {self.current}% -> {target}%")
+            try:
+                issued = time.time()
+                self.backlight.set(target)
+                self.current = target
+                if self.recorder is not None:
+                    self.recorder.record(f"brightness:{self.name}", event_time, issued, time.time())
+            except Exception as e:
+                print(f"set_light_false: {e}")
+
+    def close(self):
+        self.backlight.close()
+
+def main():
+    device = InputDevice(DEVICE_PATH)
+    recorder = LatencyRecorder()
+    recorder.install_signal_handler()
+    brightness = BrightnessControl(recorder)
+    try:
+        for event in device.read_loop():
+            if event.type == ecodes.EV_KEY:
+                key_event = categorize(event)
+
+                if key_event.keycode == "KEY_ESC" and event.value == 1:
+                    print("\nESC pressed, exiting...")
+                    break
+
+                if event.value == 1:
+                    if key_event.keycode == "KEY_BRIGHTNESSDOWN":
+                        brightness.adjust(-BRIGHTNESS_STEP, event.timestamp())
+                    elif key_event.keycode == "KEY_BRIGHTNESSUP":
+                        brightness.adjust(BRIGHTNESS_STEP, event.timestamp())
+    except KeyboardInterrupt:
+        print("\nout")
+    finally:
+        brightness.close()
+        device.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,272 @@
+import argparse
+import os
+import selectors
+import signal
+import sys
+import threading
+import time
+
+import pygame
+from evdev import InputDevice
+
+from keyboard_core import FN, FN_DEVICE, MAIN, MAIN_DEVICE, KeyboardState, available_layouts, load_layout
+from keyboard_record import EventRecorder
+
+WIDTH, HEIGHT = 1680, 960
+# How long the all-keys-tested screen stays up
+COMPLETE_DELAY = 2.0
+
+# 颜色
+BACKGROUND = (40, 44, 52)
+PANEL_BG = (30, 34, 42)
+TEXT_COLOR = (220, 220, 220)
+GOOD_COLOR = (120, 224, 143)
+DISABLED_COLOR = (100, 100, 100)
+KEY_COLOR = (60, 64, 72)
+PRESSED_KEY_COLOR = (97, 175, 239)
+
+TEXT_BOX = pygame.Rect(20, 50, WIDTH - 40, 40)
+
+class KeyboardTester:
+    """Draws a compiled layout and the test progress held in a KeyboardState.
+
+    Everything static is drawn once into full-screen layers: the background
+    with every key unlit and the same with every key lit. A key is redrawn by
+    copying its rect from one of the layers, and only keys whose lit state
+    changed, plus the history box when it changed, are pushed to the display.
+    Layouts with `caps_lock_case` get a second pair of layers with upper case
+    letters, swapped in with a full redraw when Caps Lock toggles.
+    """
+
+    def __init__(self, layout):
+        self.layout = layout
+        self.state = KeyboardState(layout)
+        self.screen = pygame.display.set_mode((WIDTH, HEIGHT))
+        pygame.display.set_caption(layout.caption)
+        self.font_chinese = pygame.font.SysFont("WenQuanYi Zen Hei", 30)
+        self.font_large = pygame.font.SysFont("Arial", 36, bold=True)
+        self.font_medium = pygame.font.SysFont("Arial", 24)
+        self.font_small = pygame.font.SysFont("Arial", 18)
+        self.rects = [pygame.Rect(rect) for rect in layout.rects[:layout.drawn]]
+        # (unlit, lit) layers by Caps Lock state
+        self.layers = {}
+        for caps_lock in ((False, True) if layout.caps_lock_case else (False,)):
+            labels = self._render_labels(caps_lock)
+            self.layers[caps_lock] = (self._draw_layer(KEY_COLOR, labels), self._draw_layer(PRESSED_KEY_COLOR, labels))
+        self.shown_caps_lock = False
+        self.background, self.lit = self.layers[False]
+        # Lit state of each key as currently on screen
+        self.shown = bytearray(layout.drawn)
+        self.shown_presses = 0
+
+    # ==================== 绘图函数 ====================
+    def _label_text(self, label, caps_lock):
+        if self.layout.caps_lock_case and len(label) == 1 and label.isalpha():
+            return label.upper() if caps_lock else label.lower()
+        return label
+
+    def _render_labels(self, caps_lock):
+        labels = []
+        for label in self.layout.labels[:self.layout.drawn]:
+            text = self._label_text(label, caps_lock)
+            font = self.font_small if len(text) > self.layout.small_label_length else self.font_medium
+            labels.append(font.render(text, True, TEXT_COLOR))
+        return labels
+
+    def _draw_layer(self, key_color, labels):
+        layer = pygame.Surface((WIDTH, HEIGHT)).convert()
+        layer.fill(BACKGROUND)
+        title = self.font_large.render(self.layout.title, True, TEXT_COLOR)
+        layer.blit(title, (WIDTH // 2 - title.get_width() // 2, 20))
+
+        pygame.draw.rect(layer, PANEL_BG, TEXT_BOX, border_radius=3)
+        pygame.draw.rect(layer, (60, 64, 72), TEXT_BOX, 1, border_radius=3)
+
+        for rect, label in zip(self.rects, labels):
+            pygame.draw.rect(layer, key_color, rect, border_radius=3)
+            pygame.draw.rect(layer, (30, 30, 30), rect, 1, border_radius=3)
+            layer.blit(label, label.get_rect(center=rect.center))
+
+        for text, y in zip(self.layout.instructions, (HEIGHT - 100, HEIGHT - 45)):
+            surf = self.font_chinese.render(text, True, DISABLED_COLOR)
+            layer.blit(surf, (WIDTH // 2 - surf.get_width() // 2, y))
+        return layer
+
+    def _draw_history(self):
+        self.screen.blit(self.background, TEXT_BOX, TEXT_BOX)
+        hist_surf = self.font_medium.render(", ".join(self.state.history), True, TEXT_COLOR)
+        self.screen.blit(hist_surf, (TEXT_BOX.x + 10, TEXT_BOX.y + 10), (0, 0, TEXT_BOX.width - 20, TEXT_BOX.height))
+        self.shown_presses = self.state.presses
+
+    def draw_keyboard(self):
+        """Full redraw, for the first frame, when the window was exposed and when Caps Lock toggled."""
+        self.shown_caps_lock = self.state.caps_lock and self.layout.caps_lock_case
+        self.background, self.lit = self.layers[self.shown_caps_lock]
+        self.screen.blit(self.background, (0, 0))
+        for key, rect in enumerate(self.rects):
+            self.shown[key] = self.state.pressed[key] or self.state.highlighted[key]
+            if self.shown[key]:
+                self.screen.blit(self.lit, rect, rect)
+        self._draw_history()
+        pygame.display.flip()
+
+    def update(self, changed):
+        """Redraw the keys in `changed` whose lit state differs from the screen, and the history."""
+        if self.layout.caps_lock_case and self.state.caps_lock != self.shown_caps_lock:
+            self.draw_keyboard()
+            return
+        dirty = []
+        for key in changed:
+            if key >= self.layout.drawn:
+                continue
+            lit = self.state.pressed[key] or self.state.highlighted[key]
+            if lit != self.shown[key]:
+                self.shown[key] = lit
+                rect = self.rects[key]
+                self.screen.blit(self.lit if lit else self.background, rect, rect)
+                dirty.append(rect)
+        if self.state.presses != self.shown_presses:
+            self._draw_history()
+            dirty.append(TEXT_BOX)
+        if dirty:
+            pygame.display.update(dirty)
+
+    def draw_complete(self):
+        self.screen.fill(BACKGROUND)
+        for key, rect in enumerate(self.rects):
+            pygame.draw.rect(self.screen, GOOD_COLOR, rect, border_radius=3)
+            pygame.draw.rect(self.screen, (30, 30, 30), rect, 1, border_radius=3)
+            txt = self.font_medium.render(self.layout.labels[key], True, (0, 0, 0))
+            self.screen.blit(txt, txt.get_rect(center=rect.center))
+        msg = self.font_large.render("ALL KEYS TESTED! EXITING...", True, GOOD_COLOR)
+        self.screen.blit(msg, (WIDTH // 2 - msg.get_width() // 2, HEIGHT // 2))
+        pygame.display.flip()
+
+# ==================== 主测试循环 ====================
+def read_devices(devices, event_type, wake_fd, stopping, recorder=None):
+    """Reader thread: blocks in select() on the evdev devices and a wakeup pipe.
+
+    Each batch read from a device is posted to the pygame queue as one
+    `event_type` event carrying (source, type, code, value) tuples, which
+    wakes the main thread out of pygame.event.wait(). The pipe receives
+    signal numbers (see signal.set_wakeup_fd) and the stop request; a
+    signal posts an empty batch so the main thread returns to Python and
+    runs the handler, e.g. raises KeyboardInterrupt. Everything read is
+    also written to `recorder` if one is given.
+    """
+    selector = selectors.DefaultSelector()
+    for source, device in devices:
+        selector.register(device, selectors.EVENT_READ, source)
+    selector.register(wake_fd, selectors.EVENT_READ)
+    while True:
+        for key, _ in selector.select():
+            if key.fileobj == wake_fd:
+                os.read(wake_fd, 512)
+                if stopping.is_set():
+                    selector.close()
+                    return
+                pygame.event.post(pygame.event.Event(event_type, events=()))
+                continue
+            try:
+                # read() returns a generator; the actual reads, and their errors, happen while listing it
+                raw = list(key.fileobj.read())
+            except BlockingIOError:
+                continue
+            except OSError as e:
+                print(f"Lost {key.fileobj.path}: {e}")
+                selector.unregister(key.fileobj)
+                continue
+            if recorder is not None:
+                recorder.write(key.data, raw)
+            events = [(key.data, ev.type, ev.code, ev.value) for ev in raw]
+            pygame.event.post(pygame.event.Event(event_type, events=events))
+
+def keyboard_test_screen(tester, device_main, device_fn, recorder=None):
+    """Runs until Ctrl+C, the window is closed, or COMPLETE_DELAY after every key was tested.
+
+    The main thread sleeps in pygame.event.wait() until device input, a
+    window event, a signal or the completion deadline, and redraws once
+    per batch.
+    """
+    event_type = pygame.event.custom_type()
+    # Only what the loop handles may wake it; mouse motion and pygame's own key events are dropped
+    pygame.event.set_blocked(None)
+    pygame.event.set_allowed([pygame.QUIT, pygame.WINDOWEXPOSED, event_type])
+    wake_r, wake_w = os.pipe()
+    os.set_blocking(wake_r, False)
+    os.set_blocking(wake_w, False)
+    previous_wakeup_fd = signal.set_wakeup_fd(wake_w)
+    stopping = threading.Event()
+    reader = threading.Thread(target=read_devices, daemon=True,
+                              args=(((MAIN, device_main), (FN, device_fn)), event_type, wake_r, stopping, recorder))
+    reader.start()
+    tester.draw_keyboard()
+    deadline = None
+    try:
+        while True:
+            # 0 waits for the next event without a timeout
+            timeout = 0 if deadline is None else max(1, int((deadline - time.monotonic()) * 1000))
+            changed = set()
+            exposed = False
+            for event in [pygame.event.wait(timeout)] + pygame.event.get():
+                if event.type == pygame.QUIT:
+                    return
+                if event.type == pygame.WINDOWEXPOSED:
+                    exposed = True
+                elif event.type == event_type:
+                    # 所有按键都从 evdev 读取，与窗口焦点和系统键盘布局无关
+                    for raw in event.events:
+                        changed.update(tester.state.handle(*raw))
+
+            if tester.state.quit:
+                return
+            if deadline is not None:
+                if time.monotonic() >= deadline:
+                    return
+                if exposed:
+                    tester.draw_complete()
+            elif tester.state.complete:
+                tester.draw_complete()
+                deadline = time.monotonic() + COMPLETE_DELAY
+            elif exposed:
+                tester.draw_keyboard()
+            else:
+                tester.update(changed)
+    finally:
+        signal.set_wakeup_fd(previous_wakeup_fd)
+        stopping.set()
+        os.write(wake_w, b"\0")
+        reader.join()
+        os.close(wake_r)
+        os.close(wake_w)
+
+def main(default_layout=None):
+    parser = argparse.ArgumentParser(description="Argon ONE UP keyboard tester")
+    parser.add_argument("--layout", default=default_layout, required=default_layout is None,
+                        choices=available_layouts(), help="keyboard_layouts/<layout>.json to test against")
+    parser.add_argument("--main-device", default=MAIN_DEVICE, help="main keyboard input device")
+    parser.add_argument("--fn-device", default=FN_DEVICE, help="Fn and brightness key input device")
+    parser.add_argument("--record", metavar="FILE",
+                        help="also write the raw input to FILE, for keyboard_record.py replay")
+    args = parser.parse_args()
+
+    layout = load_layout(args.layout)
+    device_main = InputDevice(args.main_device)
+    device_fn = InputDevice(args.fn_device)
+    recorder = EventRecorder(args.record, args.layout) if args.record else None
+    pygame.init()
+    try:
+        keyboard_test_screen(KeyboardTester(layout), device_main, device_fn, recorder)
+    except KeyboardInterrupt:
+        print("\n用户按下 Ctrl+C，程序退出")
+    finally:
+        if recorder is not None:
+            recorder.close()
+            print(f"Recorded {recorder.count} events to {args.record}")
+        device_main.close()
+        device_fn.close()
+        pygame.quit()
+    sys.exit(0)
+
+if __name__ == "__main__":
+    main()
@@ -60,6 +60,12 @@ sudo apt install -y fonts-wqy-zenhei || {
     echo "Failed to install Chinese font package. Some Chinese characters may not display properly." >&2
 }
 
+# Install the PulseAudio client library used by the volume keys
+echo "Installing python3-pulsectl..."
+sudo apt install -y python3-pulsectl || {
+    echo "Failed to install python3-pulsectl. Volume keys will fall back to running wpctl for every change." >&2
+}
+
 # Upgrade Pillow with system package compatibility
 echo "Upgrading Pillow library..."
 pip3 install --upgrade Pillow --break-system-packages || {
@@ -0,0 +1,174 @@
+from evdev import InputDevice, ecodes, list_devices
+import argparse
+import os
+import selectors
+
+import volume
+import KEY_Light
+from latency import LatencyRecorder, default_socket_path, open_report_socket, serve_report
+
+HOTKEYS = (ecodes.KEY_MUTE, ecodes.KEY_VOLUMEDOWN, ecodes.KEY_VOLUMEUP,
+           ecodes.KEY_BRIGHTNESSDOWN, ecodes.KEY_BRIGHTNESSUP)
+VOLUME_DIRECTIONS = {ecodes.KEY_VOLUMEDOWN: -1, ecodes.KEY_VOLUMEUP: 1}
+BRIGHTNESS_STEPS = {ecodes.KEY_BRIGHTNESSDOWN: -KEY_Light.BRIGHTNESS_STEP,
+                    ecodes.KEY_BRIGHTNESSUP: KEY_Light.BRIGHTNESS_STEP}
+
+def find_hotkey_devices():
+    """Open every input device that reports at least one of HOTKEYS."""
+    devices = []
+    for path in list_devices():
+        try:
+            device = InputDevice(path)
+        except OSError:
+            continue
+        keys = device.capabilities().get(ecodes.EV_KEY, [])
+        if any(code in keys for code in HOTKEYS):
+            devices.append(device)
+        else:
+            device.close()
+    return devices
+
+def open_devices(paths):
+    devices = []
+    for path in paths:
+        try:
+            devices.append(InputDevice(path))
+        except OSError as e:
+            print(f"Cannot open {path}: {e}")
+    return devices
+
+class HotkeyDispatcher:
+    """Routes volume, mute and brightness key events to their handlers.
+
+    A handler whose backend cannot be opened is left out and its keys are
+    ignored, so e.g. a missing audio server does not take brightness down.
+    """
+
+    def __init__(self, args, recorder=None):
+        self.recorder = recorder
+        self.backend = None
+        self.coalescer = None
+        self.repeater = None
+        self.brightness = None
+        try:
+            self.backend = volume.open_backend()
+            self.coalescer = volume.VolumeCoalescer(self.backend, recorder)
+            self.repeater = volume.KeyRepeater(
+                lambda direction, held, event_time:
+                    self.coalescer.step(direction * volume.step_size(held, args.max_step), event_time),
+                args.repeat_delay, args.repeat_rate, args.acceleration, args.max_rate)
+            print(f"Volume: {self.backend.volume}%, muted: {self.backend.muted} (backend: {self.backend.name})")
+        except Exception as e:
+            print(f"Volume keys disabled: {e}")
+        try:
+            self.brightness = KEY_Light.BrightnessControl(recorder, KEY_Light.open_backlight(args.backlight))
+            print(f"Brightness: {self.brightness.current}%")
+        except Exception as e:
+            print(f"Brightness keys disabled: {e}")
+
+    def handle(self, event):
+        # Repeats come from KeyRepeater, kernel autorepeat (value 2) is ignored
+        if event.type != ecodes.EV_KEY or event.value == 2:
+            return
+        if event.code == ecodes.KEY_MUTE:
+            if event.value == 1 and self.coalescer is not None:
+                self.coalescer.toggle_mute(event.timestamp())
+        elif event.code in VOLUME_DIRECTIONS:
+            if self.repeater is None:
+                return
+            if event.value == 1:
+                self.repeater.press(VOLUME_DIRECTIONS[event.code], event.timestamp())
+            else:
+                self.repeater.release(VOLUME_DIRECTIONS[event.code])
+        elif event.code in BRIGHTNESS_STEPS:
+            if event.value == 1 and self.brightness is not None:
+                self.brightness.adjust(BRIGHTNESS_STEPS[event.code], event.timestamp())
+
+    def close(self):
+        if self.repeater is not None:
+            self.repeater.stop()
+        if self.backend is not None:
+            self.backend.close()
+        if self.brightness is not None:
+            self.brightness.close()
+
+def run(devices, dispatcher, report_socket=None):
+    """Single-threaded event loop over all devices; blocks in select() between key presses."""
+    selector = selectors.DefaultSelector()
+    for device in devices:
+        selector.register(device, selectors.EVENT_READ)
+    if report_socket is not None:
+        selector.register(report_socket, selectors.EVENT_READ, data="report")
+    while len(selector.get_map()) > (report_socket is not None):
+        for key, _ in selector.select():
+            if key.data == "report":
+                serve_report(report_socket, dispatcher.recorder)
+                continue
+            device = key.fileobj
+            try:
+                for event in device.read():
+                    dispatcher.handle(event)
+            except OSError as e:
+                # Device unplugged or gone after suspend; systemd restarts us if nothing is left
+                print(f"Lost {device.path}: {e}")
+                selector.unregister(device)
+                device.close()
+    print("No input devices left")
+
+def main():
+    parser = argparse.ArgumentParser(description="Volume, mute and brightness hotkey daemon")
+    parser.add_argument("--device", action="append", default=None,
+                        help="input device to read, repeatable (default: every device with hotkeys)")
+    parser.add_argument("--repeat-delay", type=float, default=volume.REPEAT_DELAY,
+                        help="seconds a volume key is held before it starts repeating")
+    parser.add_argument("--repeat-rate", type=float, default=volume.REPEAT_RATE, help="initial repeats per second")
+    parser.add_argument("--acceleration", type=float, default=volume.REPEAT_ACCELERATION,
+                        help="repeat rate multiplier per step, 1 for a constant rate")
+    parser.add_argument("--max-rate", type=float, default=volume.REPEAT_MAX_RATE, help="repeats per second cap")
+    parser.add_argument("--max-step", type=int, default=volume.VOLUME_STEP_MAX,
+                        help="largest volume step in %% while a key is held")
+    parser.add_argument("--backlight", choices=("auto", "sysfs", "ddc"), default="auto",
+                        help="brightness backend; auto prefers the internal panel's sysfs backlight")
+    parser.add_argument("--latency-socket", default=default_socket_path(), metavar="PATH",
+                        help="Unix socket serving the key latency report ('' to disable)")
+    args = parser.parse_args()
+
+    devices = open_devices(args.device) if args.device else find_hotkey_devices()
+    if not devices:
+        print("No input devices with volume or brightness keys found")
+        raise SystemExit(1)
+    for device in devices:
+        print(f"Reading {device.path} ({device.name})")
+
+    recorder = LatencyRecorder()
+    recorder.install_signal_handler()
+    report_socket = None
+    if args.latency_socket:
+        try:
+            report_socket = open_report_socket(args.latency_socket)
+            print(f"Latency report on {args.latency_socket} (python3 latency.py) or SIGUSR1")
+        except OSError as e:
+            print(f"Cannot open {args.latency_socket}: {e}, latency report only on SIGUSR1")
+
+    dispatcher = HotkeyDispatcher(args, recorder)
+    # Exiting on lost devices lets systemd restart us and rescan
+    status = 1
+    try:
+        run(devices, dispatcher, report_socket)
+    except KeyboardInterrupt:
+        print("\nProgram exited")
+        status = 0
+    finally:
+        dispatcher.close()
+        for device in devices:
+            device.close()
+        if report_socket is not None:
+            report_socket.close()
+            try:
+                os.unlink(args.latency_socket)
+            except FileNotFoundError:
+                pass
+    raise SystemExit(status)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+from array import array
+from collections import deque
+import json
+import os
+import pickle
+
+from evdev import ecodes
+
+LAYOUT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "keyboard_layouts")
+CACHE_DIR = os.path.join(LAYOUT_DIR, "__pycache__")
+# Bump when CompiledLayout or STANDARD_KEYCODES change, so cached layouts are recompiled
+COMPILED_VERSION = 2
+HISTORY_LENGTH = 10
+# Labels longer than this use the small font, unless the layout sets "small_label_length"
+SMALL_LABEL_LENGTH = 6
+FN_KEY = "Fn"
+# Event sources: the main keyboard and the Fn / brightness device
+MAIN, FN = 0, 1
+MAIN_DEVICE = '/dev/input/event9'
+FN_DEVICE = '/dev/input/event13'
+KEY_RELEASE, KEY_PRESS, KEY_REPEAT = 0, 1, 2
+
+# evdev keycode name -> layout key for a QWERTY(Z) keyboard; a layout's
+# "keycodes" entries replace these (null removes one) and its "scancodes"
+# (numeric evdev codes) take precedence over both
+STANDARD_KEYCODES = {
+    "KEY_ESC": "esc",
+    "KEY_1": "1", "KEY_2": "2", "KEY_3": "3", "KEY_4": "4",
+    "KEY_5": "5", "KEY_6": "6", "KEY_7": "7", "KEY_8": "8",
+    "KEY_9": "9", "KEY_0": "0",
+    "KEY_TAB": "tab",
+    "KEY_Q": "q", "KEY_W": "w", "KEY_E": "e", "KEY_R": "r",
+    "KEY_T": "t", "KEY_Z": "z", "KEY_U": "u", "KEY_I": "i",
+    "KEY_O": "o", "KEY_P": "p",
+    "KEY_A": "a", "KEY_S": "s", "KEY_D": "d", "KEY_F": "f",
+    "KEY_G": "g", "KEY_H": "h", "KEY_J": "j", "KEY_K": "k",
+    "KEY_L": "l",
+    "KEY_Y": "y", "KEY_X": "x", "KEY_C": "c", "KEY_V": "v",
+    "KEY_B": "b", "KEY_N": "n", "KEY_M": "m",
+    "KEY_CAPSLOCK": "caps lock",
+    "KEY_LEFTSHIFT": "lshift", "KEY_RIGHTSHIFT": "rshift",
+    "KEY_LEFTCTRL": "lctrl", "KEY_RIGHTCTRL": "rctrl",
+    "KEY_LEFTALT": "lalt", "KEY_RIGHTALT": "ralt",
+    "KEY_SPACE": "space",
+    "KEY_BACKSPACE": "backspace",
+    "KEY_ENTER": "enter",
+    "KEY_LEFT": "left", "KEY_RIGHT": "right",
+    "KEY_UP": "up", "KEY_DOWN": "down",
+    "KEY_INSERT": "insert", "KEY_DELETE": "delete",
+    "KEY_HOME": "home", "KEY_END": "end",
+    "KEY_PAGEUP": "pgup", "KEY_PAGEDOWN": "pgdn",
+    "KEY_F1": "f1", "KEY_F2": "f2", "KEY_F3": "f3", "KEY_F4": "f4",
+    "KEY_F5": "f5", "KEY_F6": "f6", "KEY_F7": "f7", "KEY_F8": "f8",
+    "KEY_F9": "f9", "KEY_F10": "f10", "KEY_F11": "f11", "KEY_F12": "f12",
+    "KEY_SYSRQ": "prtscr",
+    "KEY_PAUSE": "pause",
+    "KEY_LEFTMETA": "win", "KEY_RIGHTMETA": "win",
+    "KEY_COMPOSE": "compose",
+}
+
+class CompiledLayout:
+    """A locale layout flattened into lookup tables.
+
+    Keys are numbered in drawing order. `main` and `fn` are indexed by evdev
+    key code and give the key number, -1 for codes the layout ignores. Keys
+    that are mapped but not drawn come after the first `drawn` keys and have
+    no rect. With `caps_lock_case`, letter labels and history entries are
+    lower case unless Caps Lock is on (or, in the history, Shift is held).
+    """
+
+    def __init__(self, name, title, caption, instructions,
+                 small_label_length=SMALL_LABEL_LENGTH, caps_lock_case=False):
+        self.name = name
+        self.title = title
+        self.caption = caption
+        self.instructions = instructions
+        self.small_label_length = small_label_length
+        self.caps_lock_case = caps_lock_case
+        self.keys = []
+        self.labels = []
+        self.shift_labels = []
+        self.rects = []
+        self.index = {}
+        self.drawn = 0
+        self.main = array("h", [-1]) * (ecodes.KEY_MAX + 1)
+        self.fn = array("h", [-1]) * (ecodes.KEY_MAX + 1)
+        self.fn_key = -1
+
+    def add_key(self, key, label=None, rect=None, shift_label=None):
+        self.index[key] = len(self.keys)
+        self.keys.append(key)
+        self.labels.append(label if label is not None else key)
+        self.shift_labels.append(shift_label)
+        self.rects.append(tuple(rect) if rect is not None else None)
+        return self.index[key]
+
+    def key_number(self, key):
+        # Mapped keys missing from the drawing are still tracked and shown in the history
+        if key in self.index:
+            return self.index[key]
+        return self.add_key(key)
+
+def keycode(layout_name, name):
+    code = ecodes.ecodes.get(name)
+    if code is None or not name.startswith("KEY_"):
+        raise ValueError(f"{layout_name}: unknown evdev key code {name}")
+    return code
+
+def compile_layout(name, data):
+    layout = CompiledLayout(name, data["title"], data.get("caption", data["title"]), data.get("instructions", []),
+                            data.get("small_label_length", SMALL_LABEL_LENGTH), data.get("caps_lock_case", False))
+    for row in data["rows"]:
+        for key in row:
+            if key["key"] in layout.index:
+                raise ValueError(f"{name}: key {key['key']!r} is drawn twice")
+            layout.add_key(key["key"], key["label"], key["rect"], key.get("shift"))
+    layout.drawn = len(layout.keys)
+
+    keycodes = dict(STANDARD_KEYCODES)
+    keycodes.update(data.get("keycodes", {}))
+    codes = {keycode(name, code_name): key for code_name, key in keycodes.items() if key is not None}
+    codes.update((int(code), key) for code, key in data.get("scancodes", {}).items())
+    for code, key in codes.items():
+        layout.main[code] = layout.key_number(key)
+
+    layout.fn_key = layout.key_number(FN_KEY)
+    layout.fn[ecodes.KEY_FN] = layout.fn_key
+    for code_name, key in data.get("fn", {}).items():
+        layout.fn[keycode(name, code_name)] = layout.key_number(key)
+    return layout
+
+def available_layouts():
+    return sorted(name[:-5] for name in os.listdir(LAYOUT_DIR) if name.endswith(".json"))
+
+def load_layout(name):
+    """Compiled layout for keyboard_layouts/<name>.json, from the on-disk cache when it is current."""
+    path = os.path.join(LAYOUT_DIR, name + ".json")
+    st = os.stat(path)
+    stamp = (COMPILED_VERSION, st.st_mtime_ns, st.st_size)
+    cache_path = os.path.join(CACHE_DIR, name + ".pickle")
+    try:
+        with open(cache_path, "rb") as f:
+            cached_stamp, layout = pickle.load(f)
+        if cached_stamp == stamp:
+            return layout
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ValueError):
+        pass
+
+    with open(path, encoding="utf-8") as f:
+        layout = compile_layout(name, json.load(f))
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        tmp_path = f"{cache_path}.{os.getpid()}"
+        with open(tmp_path, "wb") as f:
+            pickle.dump((stamp, layout), f, pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        print(f"Cannot cache compiled layout {name}: {e}")
+    return layout
+
+class KeyboardState:
+    """Key test progress for one layout, driven by raw evdev key events.
+
+    Does no pygame or device I/O, so recorded event streams can be replayed
+    through it headless. handle() returns the numbers of the keys whose
+    pressed or highlighted state it changed.
+    """
+
+    def __init__(self, layout):
+        self.layout = layout
+        self.pressed = bytearray(len(layout.keys))
+        self.highlighted = bytearray(len(layout.keys))
+        self.remaining = layout.drawn
+        self.history = deque(maxlen=HISTORY_LENGTH)
+        # Key presses so far, including those that scrolled out of the history
+        self.presses = 0
+        self.quit = False
+        self.caps_lock = False
+        self.caps_lock_key = self.layout.index.get("caps lock", -1)
+        self.shift = self._numbers("lshift", "rshift")
+        self.ctrl = self._numbers("lctrl", "rctrl")
+        self.alt = self._numbers("lalt", "ralt")
+
+    def _numbers(self, *keys):
+        return tuple(self.layout.index[key] for key in keys if key in self.layout.index)
+
+    def _held(self, keys):
+        return any(self.pressed[key] for key in keys)
+
+    @property
+    def complete(self):
+        return self.remaining == 0
+
+    def _press(self, key):
+        self.pressed[key] = 1
+        if not self.highlighted[key]:
+            self.highlighted[key] = 1
+            if key < self.layout.drawn:
+                self.remaining -= 1
+
+    def _log(self, text):
+        self.history.append(text)
+        self.presses += 1
+
+    def history_label(self, key):
+        shift_label = self.layout.shift_labels[key]
+        if shift_label and self._held(self.shift):
+            return shift_label
+        name = self.layout.keys[key]
+        if len(name) != 1:
+            return name
+        if self.layout.caps_lock_case and name.isalpha() and not (self.caps_lock or self._held(self.shift)):
+            return name
+        return name.upper()
+
+    def reset(self):
+        changed = [key for key in range(len(self.highlighted)) if self.highlighted[key]]
+        self.highlighted = bytearray(len(self.layout.keys))
+        self.remaining = self.layout.drawn
+        return changed
+
+    def handle(self, source, type, code, value):
+        # Kernel autorepeat (value 2) neither adds to the history nor changes state
+        if type != ecodes.EV_KEY or value == KEY_REPEAT or code > ecodes.KEY_MAX:
+            return ()
+        key = (self.layout.main if source == MAIN else self.layout.fn)[code]
+        if key < 0:
+            return ()
+        if value == KEY_RELEASE:
+            if not self.pressed[key]:
+                return ()
+            self.pressed[key] = 0
+            return (key,)
+
+        self._press(key)
+        if key == self.caps_lock_key:
+            self.caps_lock = not self.caps_lock
+        if source == FN:
+            if key == self.layout.fn_key:
+                return (key,)
+            # Fn combinations arrive as their own code, with no separate Fn press
+            self._press(self.layout.fn_key)
+            self._log(f"Fn+{self.layout.keys[key].upper()}")
+            return (key, self.layout.fn_key)
+
+        self._log(self.history_label(key))
+        name = self.layout.keys[key]
+        if name == "c" and self._held(self.ctrl):
+            self.quit = True
+        elif name == "q" and self._held(self.ctrl) and self._held(self.alt):
+            return [key] + self.reset()
+        return (key,)
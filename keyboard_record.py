@@ -0,0 +1,222 @@
+import argparse
+import selectors
+import struct
+import sys
+import time
+from datetime import datetime
+
+from evdev import InputDevice, ecodes
+
+from keyboard_core import FN, FN_DEVICE, MAIN, MAIN_DEVICE, KeyboardState, available_layouts, load_layout
+
+MAGIC = b"ARGONKB1"
+VERSION = 1
+# magic, version, record size, recording start (wall clock), layout name
+HEADER = struct.Struct("<8sHHd16s")
+# evdev timestamp, source (MAIN/FN), type, code, value, MSC_SCAN scancode of an EV_KEY event (0 if none)
+RECORD = struct.Struct("<dBHHiI")
+SOURCE_NAMES = {MAIN: "main", FN: "fn"}
+
+
+class EventRecorder:
+    """Appends raw evdev events, as read from the tester's devices, to a recording file.
+
+    Every event is kept, including EV_SYN and EV_MSC. The scancode of the
+    MSC_SCAN event a keyboard sends before each key event is also copied into
+    that EV_KEY record.
+    """
+
+    def __init__(self, path, layout_name=""):
+        self.path = path
+        self.file = open(path, "wb")
+        self.file.write(HEADER.pack(MAGIC, VERSION, RECORD.size, time.time(), layout_name.encode()))
+        self.scancodes = {}
+        self.count = 0
+
+    def write(self, source, events):
+        """Appends one batch; `events` is a list, not the generator InputDevice.read() returns."""
+        buffer = bytearray()
+        for ev in events:
+            scancode = 0
+            if ev.type == ecodes.EV_MSC and ev.code == ecodes.MSC_SCAN:
+                self.scancodes[source] = ev.value
+            elif ev.type == ecodes.EV_KEY:
+                scancode = self.scancodes.pop(source, 0)
+            buffer += RECORD.pack(ev.timestamp(), source, ev.type, ev.code, ev.value, scancode & 0xFFFFFFFF)
+        self.file.write(buffer)
+        # One write per batch, so a killed tester still leaves everything up to its last key
+        self.file.flush()
+        self.count += len(events)
+
+    def close(self):
+        self.file.close()
+
+
+def read_recording(path):
+    """Header fields and the list of (time, source, type, code, value, scancode) records."""
+    with open(path, "rb") as f:
+        data = f.read()
+    if len(data) < HEADER.size:
+        raise ValueError(f"{path}: truncated header")
+    magic, version, record_size, start, layout_name = HEADER.unpack_from(data, 0)
+    if magic != MAGIC or version != VERSION or record_size != RECORD.size:
+        raise ValueError(f"{path}: not a keyboard recording")
+    # A partially written last record is ignored
+    end = HEADER.size + (len(data) - HEADER.size) // RECORD.size * RECORD.size
+    records = list(RECORD.iter_unpack(memoryview(data)[HEADER.size:end]))
+    return start, layout_name.rstrip(b"\0").decode(), records
+
+
+def replay(layout, records, on_batch=None, state=None):
+    """Feeds records through `state` (a fresh KeyboardState by default), stopping where the tester would quit.
+
+    `on_batch(changed)` is called with the keys changed since the last call
+    at every EV_SYN, the end of one device read. Returns the state and the
+    index of the record that completed the test, or None.
+    """
+    if state is None:
+        state = KeyboardState(layout)
+    completed_at = None
+    changed = set()
+    for index, (_, source, ev_type, code, value, _) in enumerate(records):
+        changed.update(state.handle(source, ev_type, code, value))
+        if completed_at is None and state.complete:
+            completed_at = index
+        if ev_type == ecodes.EV_SYN and on_batch is not None:
+            on_batch(changed)
+            changed = set()
+        if state.quit:
+            break
+    if changed and on_batch is not None:
+        on_batch(changed)
+    return state, completed_at
+
+
+def paced(records, speed):
+    """Yields records no faster than they were recorded, scaled by `speed`."""
+    if not records:
+        return
+    first = records[0][0]
+    started = time.monotonic()
+    for record in records:
+        delay = (record[0] - first) / speed - (time.monotonic() - started)
+        if delay > 0:
+            time.sleep(delay)
+        yield record
+
+
+def record_main(args):
+    layout_name = args.layout or ""
+    devices = [(MAIN, InputDevice(args.main_device)), (FN, InputDevice(args.fn_device))]
+    selector = selectors.DefaultSelector()
+    for source, device in devices:
+        selector.register(device, selectors.EVENT_READ, source)
+        print(f"Recording {SOURCE_NAMES[source]} device {device.path} ({device.name})")
+    recorder = EventRecorder(args.file, layout_name)
+    print(f"Writing {args.file}, press Ctrl+C to stop")
+    try:
+        while selector.get_map():
+            for key, _ in selector.select():
+                try:
+                    raw = list(key.fileobj.read())
+                except BlockingIOError:
+                    pass
+                except OSError as e:
+                    print(f"Lost {key.fileobj.path}: {e}")
+                    selector.unregister(key.fileobj)
+                else:
+                    recorder.write(key.data, raw)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        recorder.close()
+        for _, device in devices:
+            device.close()
+    print(f"\nRecorded {recorder.count} events to {args.file}")
+
+
+def replay_gui(layout, records):
+    import pygame
+    from Key_Board import KeyboardTester
+
+    pygame.init()
+    tester = KeyboardTester(layout)
+    tester.draw_keyboard()
+
+    def draw(changed):
+        pygame.event.pump()
+        tester.update(changed)
+    try:
+        return replay(layout, records, draw, tester.state)
+    finally:
+        pygame.quit()
+
+
+def replay_main(args):
+    start, recorded_layout, records = read_recording(args.file)
+    layout_name = args.layout or recorded_layout
+    if not layout_name:
+        print(f"{args.file} does not name its layout, pass --layout")
+        sys.exit(2)
+    layout = load_layout(layout_name)
+    keys = sum(1 for r in records if r[2] == ecodes.EV_KEY and r[4] == 1)
+    span = records[-1][0] - records[0][0] if records else 0.0
+    print(f"{args.file}: {len(records)} events, {keys} key presses over {span:.1f} s, "
+          f"recorded {datetime.fromtimestamp(start):%Y-%m-%d %H:%M:%S}, replayed against {layout_name}")
+
+    if args.repeat and records:
+        # Throughput of the event core alone
+        elapsed = 0.0
+        for _ in range(args.repeat):
+            t0 = time.perf_counter()
+            replay(layout, records)
+            elapsed += time.perf_counter() - t0
+        total = len(records) * args.repeat
+        print(f"Benchmark: {total} events in {elapsed:.3f} s, {total / elapsed:,.0f} events/s, "
+              f"{elapsed / total * 1e6:.2f} us/event")
+
+    stream = paced(records, args.speed) if args.realtime else records
+    if args.gui:
+        state, completed_at = replay_gui(layout, stream)
+    else:
+        state, completed_at = replay(layout, stream)
+
+    untested = [layout.keys[key] for key in range(layout.drawn) if not state.highlighted[key]]
+    if completed_at is not None:
+        print(f"All {layout.drawn} keys tested after {records[completed_at][0] - records[0][0]:.1f} s")
+    else:
+        print(f"{len(untested)} of {layout.drawn} keys never pressed: {', '.join(untested)}")
+    if state.quit:
+        print("Replay stopped at Ctrl+C")
+    print("History: " + ", ".join(state.history))
+    sys.exit(0 if completed_at is not None else 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record and replay keyboard tester input")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    record = commands.add_parser("record", help="record the main keyboard and Fn devices until Ctrl+C")
+    record.add_argument("file")
+    record.add_argument("--layout", choices=available_layouts(), help="layout to store in the recording")
+    record.add_argument("--main-device", default=MAIN_DEVICE, help="main keyboard input device")
+    record.add_argument("--fn-device", default=FN_DEVICE, help="Fn and brightness key input device")
+
+    play = commands.add_parser("replay", help="feed a recording to the tester core; exit status 0 if every key was tested")
+    play.add_argument("file")
+    play.add_argument("--layout", choices=available_layouts(), help="layout to test against (default: the recorded one)")
+    play.add_argument("--realtime", action="store_true", help="keep the recorded timing instead of replaying at full speed")
+    play.add_argument("--speed", type=float, default=1.0, help="timing multiplier for --realtime")
+    play.add_argument("--gui", action="store_true", help="draw the replay in the tester window")
+    play.add_argument("--repeat", type=int, default=0, metavar="N",
+                      help="first benchmark the event core by replaying N times")
+    args = parser.parse_args()
+
+    if args.command == "record":
+        record_main(args)
+    else:
+        replay_main(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+import os
+import signal
+import socket
+import threading
+import time
+
+# Upper bucket bounds in milliseconds
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+# queue: key event -> command issued, backend: issued -> completed, total: event -> completed
+STAGES = ("queue", "backend", "total")
+SOCKET_NAME = "hotkeys-latency.sock"
+
+class LatencyHistogram:
+    def __init__(self, buckets=LATENCY_BUCKETS_MS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, ms):
+        for i, bound in enumerate(self.buckets):
+            if ms <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.count += 1
+        self.total += ms
+        self.max = max(self.max, ms)
+
+    def percentile(self, q):
+        # Upper bound of the bucket holding the q-th sample; the true max for the overflow bucket
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+class LatencyRecorder:
+    """Per-action latency histograms for key events, safe to update from worker threads.
+
+    Times are wall-clock seconds, the clock evdev stamps events with.
+    """
+
+    def __init__(self):
+        # Reentrant: the SIGUSR1 handler can interrupt the main thread inside record()
+        self.lock = threading.RLock()
+        self.histograms = {}
+        self.coalesced_counts = {}
+        self.started = time.time()
+
+    def record(self, action, event_time, issued, completed):
+        with self.lock:
+            if action not in self.histograms:
+                self.histograms[action] = {stage: LatencyHistogram() for stage in STAGES}
+            stages = self.histograms[action]
+            stages["queue"].observe((issued - event_time) * 1000.0)
+            stages["backend"].observe((completed - issued) * 1000.0)
+            stages["total"].observe((completed - event_time) * 1000.0)
+
+    def coalesced(self, action):
+        # A request superseded by a newer one before it was issued
+        with self.lock:
+            self.coalesced_counts[action] = self.coalesced_counts.get(action, 0) + 1
+
+    def report(self):
+        with self.lock:
+            lines = [f"Key latency over {time.time() - self.started:.0f} s (ms)",
+                     f"{'action':<22} {'stage':<8} {'count':>6} {'mean':>8} {'p50':>6} {'p90':>6} "
+                     f"{'p99':>6} {'max':>8}"]
+            for action in sorted(self.histograms):
+                for stage in STAGES:
+                    h = self.histograms[action][stage]
+                    lines.append(f"{action:<22} {stage:<8} {h.count:>6} {h.total / h.count:>8.1f} "
+                                 f"{h.percentile(0.5):>6.0f} {h.percentile(0.9):>6.0f} "
+                                 f"{h.percentile(0.99):>6.0f} {h.max:>8.1f}")
+            for action in sorted(self.coalesced_counts):
+                lines.append(f"{action}: {self.coalesced_counts[action]} requests coalesced")
+            if not self.histograms:
+                lines.append("no key events yet")
+            return "\n".join(lines) + "\n"
+
+    def install_signal_handler(self, signum=signal.SIGUSR1):
+        signal.signal(signum, lambda *_: print(self.report(), flush=True))
+
+def default_socket_path():
+    return os.path.join(os.environ.get("XDG_RUNTIME_DIR", "/tmp"), SOCKET_NAME)
+
+def open_report_socket(path=None):
+    """Listening Unix socket that answers every connection with the latency report."""
+    path = path or default_socket_path()
+    if os.path.exists(path):
+        os.unlink(path)
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.bind(path)
+    os.chmod(path, 0o600)
+    sock.listen(4)
+    sock.setblocking(False)
+    return sock
+
+def serve_report(sock, recorder):
+    try:
+        conn, _ = sock.accept()
+    except BlockingIOError:
+        return
+    with conn:
+        conn.setblocking(True)
+        conn.settimeout(1.0)
+        try:
+            conn.sendall(recorder.report().encode())
+        except OSError:
+            pass
+
+def main():
+    path = default_socket_path()
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(path)
+        except OSError as e:
+            print(f"Cannot connect to {path}: {e}")
+            raise SystemExit(1)
+        chunks = []
+        while True:
+            chunk = sock.recv(65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+    print(b"".join(chunks).decode(), end="")
+
+if __name__ == "__main__":
+    main()
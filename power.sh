@@ -1 +0,0 @@
-i2ctransfer -f -y 1 w81@0x64 0x10 0x32 0x00 0x00 0x00 0x00 0x00 0x00 0x00 0xA8 0xAA 0xBE 0xC6 0xB8 0xAE 0xC2 0x98 0x82 0xFF 0xFF 0xCA 0x98 0x75 0x63 0x55 0x4E 0x4C 0x49 0x98 0x88 0xDC 0x34 0xDB 0xD3 0xD4 0xD3 0xD0 0xCE 0xCB 0xBB 0xE7 0xA2 0xC2 0xC4 0xAE 0x96 0x89 0x80 0x74 0x67 0x63 0x71 0x8E 0x9F 0x85 0x6F 0x3B 0x20 0x00 0xAB 0x10 0x00 0xB0 0x73 0x00 0x00 0x00 0x64 0x08 0xD3 0x77 0x00 0x00 0x00 0x00 0x00 0x00 0x00 0x00 0x00 0xAC
\ No newline at end of file
@@ -1,14 +1,23 @@
 #!/usr/bin/env python3
 """
 Systemd user service auto-install script
-Used to automatically create and enable volume.service in the user's home directory
+Used to automatically create and enable hotkeys.service (volume, mute and brightness keys)
+in the user's home directory, replacing the old volume.service and KEY_Light.service
 """
 import os
+import grp
 import sys
 import subprocess
 import pwd
 import getpass
 import stat
+import importlib.util
+
+SERVICE_NAME = "hotkeys.service"
+SCRIPT_DIR = os.path.join("argon-scripts", "Argon_Notebook_Test-main")
+REQUIRED_SCRIPTS = ("hotkeys.py", "volume.py", "KEY_Light.py", "latency.py")
+LEGACY_USER_SERVICE = "volume.service"
+LEGACY_SYSTEM_SERVICE = "/etc/systemd/system/KEY_Light.service"
 
 def get_current_user_info():
     """Retrieve current user information"""
@@ -23,15 +32,16 @@ def get_current_user_info():
         print(f"Failed to retrieve user info: {e}")
         return None, None, None
 
-def generate_service_content(user_home):
+def generate_service_content(script_dir):
     """Generate user service file content"""
     return f"""[Unit]
-Description=Volume Control Python Script
+Description=Volume, Mute and Brightness Hotkey Daemon
 After=graphical-session.target
 
 [Service]
 Type=simple
-ExecStart=/usr/bin/python3 {user_home}/volume.py
+ExecStart=/usr/bin/python3 {script_dir}/hotkeys.py
+WorkingDirectory={script_dir}
 Restart=always
 RestartSec=5
 Environment=PYTHONUNBUFFERED=1
@@ -55,7 +65,7 @@ def create_user_service_directory(user_home, user_id):
 
 def create_service_file(user_home, user_id, service_content):
     """Create systemd user service file"""
-    service_path = os.path.join(user_home, ".config", "systemd", "user", "volume.service")
+    service_path = os.path.join(user_home, ".config", "systemd", "user", SERVICE_NAME)
     try:
         with open(service_path, 'w') as f:
             f.write(service_content)
@@ -84,18 +94,53 @@ def run_systemctl_user_command(user, command, check=True):
     except Exception as e:
         print(f"Unexpected error executing {' '.join(command)}: {e}")
         return None
-def check_volume_script_exists(user_home):
-    """Check if volume.py script exists"""
-    volume_script = os.path.join(user_home, "volume.py")
-    if not os.path.exists(volume_script):
-        print(f"Warning: {volume_script} not found")
-        print("Please ensure your volume.py script is located in the user's home directory")
+def check_hotkey_scripts_exist(script_dir):
+    """Check if hotkeys.py and the modules it imports exist"""
+    missing = [name for name in REQUIRED_SCRIPTS if not os.path.exists(os.path.join(script_dir, name))]
+    if missing:
+        print(f"Warning: {', '.join(missing)} not found in {script_dir}")
         response = input("Continue with installation? (y/N): ")
         if response.lower() != 'y':
             print("Installation aborted")
             return False
     return True
 
+def remove_legacy_services(user, user_home):
+    """Stop and remove volume.service (user) and KEY_Light.service (system), which hotkeys.service replaces"""
+    legacy_user_path = os.path.join(user_home, ".config", "systemd", "user", LEGACY_USER_SERVICE)
+    if os.path.exists(legacy_user_path):
+        run_systemctl_user_command(user, ['disable', '--now', LEGACY_USER_SERVICE], check=False)
+        try:
+            os.remove(legacy_user_path)
+            print(f"Removed legacy user service: {legacy_user_path}")
+        except Exception as e:
+            print(f"Failed to remove {legacy_user_path}: {e}")
+    if os.path.exists(LEGACY_SYSTEM_SERVICE):
+        service = os.path.basename(LEGACY_SYSTEM_SERVICE)
+        try:
+            subprocess.run(['sudo', 'systemctl', 'disable', '--now', service], check=False)
+            subprocess.run(['sudo', 'rm', '-f', LEGACY_SYSTEM_SERVICE], check=True)
+            subprocess.run(['sudo', 'systemctl', 'daemon-reload'], check=True)
+            print(f"Removed legacy system service: {LEGACY_SYSTEM_SERVICE}")
+        except Exception as e:
+            print(f"Failed to remove {LEGACY_SYSTEM_SERVICE}: {e}")
+
+def check_device_access(user):
+    """The daemon runs as the user: it needs input for evdev, video for sysfs backlight and i2c for ddcutil"""
+    groups = {g.gr_name for g in grp.getgrall() if user in g.gr_mem}
+    for group in ("input", "video", "i2c"):
+        if group not in groups:
+            print(f"Warning: {user} is not in the '{group}' group, add it with: sudo usermod -aG {group} {user}")
+
+def install_audio_backend():
+    """volume.py keeps one PulseAudio connection through pulsectl; without it every volume step runs wpctl"""
+    if importlib.util.find_spec("pulsectl") is not None:
+        return
+    print("Installing python3-pulsectl for the volume keys...")
+    result = subprocess.run(['sudo', 'apt', 'install', '-y', 'python3-pulsectl'], check=False)
+    if result.returncode != 0:
+        print("Warning: python3-pulsectl could not be installed, volume keys will fall back to wpctl")
+
 def check_user_systemd_session(user):
     """Check if user has an active systemd session"""
     try:
@@ -110,7 +155,7 @@ def check_user_systemd_session(user):
 
 def main():
     """Main function"""
-    print("Starting installation of user volume.service...")
+    print(f"Starting installation of user {SERVICE_NAME}...")
 
     # Get current user information
     user, user_home, user_id = get_current_user_info()
@@ -119,12 +164,15 @@ def main():
         sys.exit(1)
     print(f"Detected user: {user}, home directory: {user_home}, UID: {user_id}")
 
-    # Check if volume.py exists
-    if not check_volume_script_exists(user_home):
+    # Check if hotkeys.py exists
+    script_dir = os.path.join(user_home, SCRIPT_DIR)
+    if not check_hotkey_scripts_exist(script_dir):
         sys.exit(1)
+    check_device_access(user)
+    install_audio_backend()
 
     # Generate service content
-    service_content = generate_service_content(user_home)
+    service_content = generate_service_content(script_dir)
     print("Generated user service configuration:")
     print(service_content)
 
@@ -134,6 +182,9 @@ def main():
         print("Installation aborted")
         sys.exit(0)
 
+    # The hotkey daemon replaces both old services, which would otherwise fight over the same device
+    remove_legacy_services(user, user_home)
+
     # Create user service directory
     if not create_user_service_directory(user_home, user_id):
         sys.exit(1)
@@ -156,26 +207,26 @@ def main():
         sys.exit(1)
 
     # Enable service
-    if not run_systemctl_user_command(user, ['enable', 'volume.service']):
+    if not run_systemctl_user_command(user, ['enable', SERVICE_NAME]):
         sys.exit(1)
 
     # Start service
-    if not run_systemctl_user_command(user, ['start', 'volume.service']):
+    if not run_systemctl_user_command(user, ['start', SERVICE_NAME]):
         sys.exit(1)
 
-    if not run_systemctl_user_command(user, ['restart', 'volume.service']):
+    if not run_systemctl_user_command(user, ['restart', SERVICE_NAME]):
         sys.exit(1)
 
     # Check service status
     print("\nInstallation completed, checking user service status:")
-    run_systemctl_user_command(user, ['status', 'volume.service'], check=False)
+    run_systemctl_user_command(user, ['status', SERVICE_NAME], check=False)
 
     print(f"\nUser service installed and started for user: {user}")
     print("You can manage the user service with the following commands:")
-    print(f" systemctl --user status volume.service # Check status")
-    print(f" systemctl --user stop volume.service # Stop service")
-    print(f" systemctl --user restart volume.service # Restart service")
-    print(f" journalctl --user -u volume.service -f # View logs")
+    print(f" systemctl --user status hotkeys.service # Check status")
+    print(f" systemctl --user stop hotkeys.service # Stop service")
+    print(f" systemctl --user restart hotkeys.service # Restart service")
+    print(f" journalctl --user -u hotkeys.service -f # View logs")
     print(f"\nIf the service fails to start, ensure lingering is enabled:")
     print(f" sudo loginctl enable-linger {user}")
 
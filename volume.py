@@ -1,129 +1,383 @@
 from evdev import InputDevice, categorize, ecodes
+import argparse
 import subprocess
 import time
 import threading
 
+from latency import LatencyRecorder
+
+try:
+    import pulsectl
+except ImportError:
+    pulsectl = None
+
 # Use Consumer Control device (event13)
-device = InputDevice('/dev/input/event13')
+DEVICE_PATH = '/dev/input/event13'
+SINK = "@DEFAULT_AUDIO_SINK@"
+DEFAULT_VOLUME = 50
+VOLUME_STEP = 5
+# While a key is held the step grows by 1% every STEP_GROWTH_TIME seconds, up to VOLUME_STEP_MAX
+VOLUME_STEP_MAX = 10
+STEP_GROWTH_TIME = 0.5
+# Sink change events this soon after our own set are assumed to be its echo
+ECHO_WINDOW = 0.5
+# Without a change monitor, re-query wpctl at most this often
+CACHE_TTL = 2.0
+# Hold-to-repeat: first repeat after REPEAT_DELAY, then REPEAT_RATE steps per
+# second, multiplied by REPEAT_ACCELERATION per step up to REPEAT_MAX_RATE
+REPEAT_DELAY = 0.3
+REPEAT_RATE = 10.0
+REPEAT_ACCELERATION = 1.0
+REPEAT_MAX_RATE = 30.0
 
-# Initialize volume state
-is_muted = False
-# Variables for continuous adjustment
-continuous_adjustment = False
-adjustment_direction = 0  # 0: no adjustment, -1: decrease, 1: increase
-adjustment_lock = threading.Lock()
+class PulseVolume:
+    """Default sink volume over a persistent PulseAudio / pipewire-pulse connection.
 
-def get_current_volume():
-    try:
-        # Get current volume percentage
-        output = subprocess.check_output(["wpctl", "get-volume", "@DEFAULT_AUDIO_SINK@"], text=True)
-       
-        # Check if muted
-        global is_muted
-        if "MUTED" in output:
-            is_muted = True
-        else:
-            is_muted = False
-       
-        # Parse volume percentage
-        for part in output.split():
-            if part.endswith('%'):
-                return int(float(part[:-1]))
-            elif part.replace('.', '').isdigit(): # Handle decimal format
-                return int(float(part) * 100)
-       
-        return 50 # Default value
-    except Exception as e:
-        print(f"Failed to get volume: {e}")
-        return 50 # Default value
+    Volume and mute are cached and refreshed from sink/server change events,
+    which arrive on a second connection since pulsectl blocks while listening.
+    """
 
-def adjust_volume(delta):
-    try:
-        # Get current volume
-        current_volume = get_current_volume()
-       
-        # Calculate new volume (0-100 range)
-        new_volume = max(0, min(100, current_volume + delta))
-       
-        print(f"Adjusting volume: {current_volume}% -> {new_volume}%")
-       
-        # Set new volume (using percentage format)
-        subprocess.run(["wpctl", "set-volume", "@DEFAULT_AUDIO_SINK@", f"{new_volume}%"], check=True)
-       
-        # If previously muted and volume adjusted, unmute
-        global is_muted
-        if is_muted and delta != 0:
-            subprocess.run(["wpctl", "set-mute", "@DEFAULT_AUDIO_SINK@", "0"], check=True)
-            is_muted = False
-           
-    except Exception as e:
-        print(f"Failed to adjust volume: {e}")
+    name = "pulsectl"
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pulse = pulsectl.Pulse("argon-volume")
+        self.sink = None
+        self.volume = DEFAULT_VOLUME
+        self.muted = False
+        self.refresh()
+        self.events = pulsectl.Pulse("argon-volume-events")
+        self.events.event_mask_set("sink", "server")
+        self.events.event_callback_set(lambda event: self.refresh())
+        self.thread = threading.Thread(target=self._listen, daemon=True)
+        self.thread.start()
+
+    def _listen(self):
+        try:
+            self.events.event_listen()
+        except Exception as e:
+            print(f"Volume event subscription lost: {e}")
+
+    def refresh(self):
+        with self.lock:
+            try:
+                self.sink = self.pulse.get_sink_by_name(self.pulse.server_info().default_sink_name)
+                self.volume = round(self.sink.volume.value_flat * 100)
+                self.muted = bool(self.sink.mute)
+            except Exception as e:
+                print(f"Failed to get volume: {e}")
+
+    def sync(self):
+        # The cache is kept current by change events
+        pass
+
+    def set_volume(self, percent):
+        with self.lock:
+            self.pulse.volume_set_all_chans(self.sink, percent / 100.0)
+            self.volume = percent
+
+    def set_mute(self, muted):
+        with self.lock:
+            self.pulse.mute(self.sink, muted)
+            self.muted = muted
+
+    def close(self):
+        self.events.close()
+        self.pulse.close()
+
+class WpctlVolume:
+    """Fallback backend: wpctl for sets, volume and mute cached in memory.
+
+    A long-lived `pactl subscribe` monitor, when available, marks the cache
+    stale on sink changes made elsewhere; otherwise it expires after CACHE_TTL.
+    """
+
+    name = "wpctl"
+
+    def __init__(self):
+        self.volume = DEFAULT_VOLUME
+        self.muted = False
+        self.stale = True
+        self.refreshed = 0.0
+        self.last_set = 0.0
+        self.monitor = None
+        try:
+            self.monitor = subprocess.Popen(["pactl", "subscribe"], stdout=subprocess.PIPE,
+                                            stderr=subprocess.DEVNULL, text=True)
+            threading.Thread(target=self._watch, daemon=True).start()
+        except OSError:
+            print("pactl not available, volume cache expires after "
+                  f"{CACHE_TTL:g} s instead of following change events")
+        self.refresh()
+
+    def _watch(self):
+        for line in self.monitor.stdout:
+            if ("on sink" in line or "on server" in line) and time.monotonic() - self.last_set > ECHO_WINDOW:
+                self.stale = True
+        self.monitor = None
+
+    def refresh(self):
+        try:
+            # Get current volume percentage
+            output = subprocess.check_output(["wpctl", "get-volume", SINK], text=True)
+            self.muted = "MUTED" in output
+            # Parse volume percentage
+            for part in output.split():
+                if part.endswith('%'):
+                    self.volume = int(float(part[:-1]))
+                    break
+                elif part.replace('.', '').isdigit(): # Handle decimal format
+                    self.volume = int(float(part) * 100)
+                    break
+            self.stale = False
+            self.refreshed = time.monotonic()
+        except Exception as e:
+            print(f"Failed to get volume: {e}")
+
+    def sync(self):
+        if self.stale or (self.monitor is None and time.monotonic() - self.refreshed > CACHE_TTL):
+            self.refresh()
+
+    def set_volume(self, percent):
+        self.last_set = time.monotonic()
+        subprocess.run(["wpctl", "set-volume", SINK, f"{percent}%"], check=True)
+        self.volume = percent
+
+    def set_mute(self, muted):
+        self.last_set = time.monotonic()
+        subprocess.run(["wpctl", "set-mute", SINK, "1" if muted else "0"], check=True)
+        self.muted = muted
+
+    def close(self):
+        if self.monitor is not None:
+            self.monitor.terminate()
+
+def open_backend():
+    if pulsectl is not None:
+        try:
+            return PulseVolume()
+        except Exception as e:
+            print(f"pulsectl connection failed ({e}), falling back to wpctl")
+    return WpctlVolume()
+
+class VolumeCoalescer:
+    """Applies volume changes and mute toggles to the backend with at most one call in flight.
 
-def toggle_mute():
-    global is_muted
+    Steps are queued as relative changes and only resolved to a target on
+    the worker thread, against the backend's volume once any earlier set has
+    returned, so key handling never syncs with or waits on the backend.
+    Steps queued while a set is running add up and are applied as one set
+    when it returns. Mute toggles queued behind it are applied after the
+    volume; a step unmutes, so it drops the toggles queued before it. The
+    worker thread only exists while there is something to apply.
+
+    `event_time` is the evdev timestamp of the key press behind a step, None
+    for timer repeats; it is reported to `recorder` when the set completes.
+    """
+
+    def __init__(self, backend, recorder=None):
+        self.backend = backend
+        self.recorder = recorder
+        self.lock = threading.Lock()
+        self.delta = 0
+        self.origin = None
+        self.pending = False
+        self.mute_toggles = 0
+        self.mute_time = None
+        self.busy = False
+
+    def step(self, delta, event_time=None):
+        origin = ("volume", event_time) if event_time is not None else ("volume-repeat", time.time())
+        with self.lock:
+            if self.pending:
+                if self.recorder is not None:
+                    self.recorder.coalesced(self.origin[0])
+                self.delta += delta
+            else:
+                self.delta = delta
+            if self.mute_toggles and self.recorder is not None:
+                self.recorder.coalesced("mute")
+            self.origin = origin
+            self.pending = True
+            self.mute_toggles = 0
+            self._start()
+
+    def toggle_mute(self, event_time=None):
+        with self.lock:
+            if self.mute_toggles and self.recorder is not None:
+                self.recorder.coalesced("mute")
+            self.mute_toggles += 1
+            self.mute_time = event_time
+            self._start()
+
+    def _start(self):
+        # Called with the lock held
+        if not self.busy:
+            self.busy = True
+            threading.Thread(target=self._apply, daemon=True).start()
+
+    def _apply(self):
+        while True:
+            with self.lock:
+                if not self.pending and not self.mute_toggles:
+                    self.busy = False
+                    return
+                pending, delta = self.pending, self.delta
+                action, event_time = self.origin if pending else (None, None)
+                toggles, mute_time = self.mute_toggles, self.mute_time
+                self.pending = False
+                self.mute_toggles = 0
+            if pending:
+                try:
+                    self.backend.sync()
+                    # Calculate new volume (0-100 range)
+                    target = max(0, min(100, self.backend.volume + delta))
+                    if target != self.backend.volume or self.backend.muted:
+                        print(f"Adjusting volume: {self.backend.volume}% -> {target}%")
+                        issued = time.time()
+                        self.backend.set_volume(target)
+                        # If previously muted and volume adjusted, unmute
+                        if self.backend.muted:
+                            self.backend.set_mute(False)
+                        if self.recorder is not None:
+                            self.recorder.record(f"{action}:{self.backend.name}", event_time, issued, time.time())
+                except Exception as e:
+                    print(f"Failed to adjust volume: {e}")
+            # Two presses while the backend was busy cancel out
+            if toggles % 2:
+                toggle_mute(self.backend, self.recorder, mute_time)
+
+def step_size(held, max_step=VOLUME_STEP_MAX):
+    return min(VOLUME_STEP + int(held / STEP_GROWTH_TIME), max(max_step, VOLUME_STEP))
+
+def toggle_mute(backend, recorder=None, event_time=None):
     try:
-        if is_muted:
-            # Unmute
-            subprocess.run(["wpctl", "set-mute", "@DEFAULT_AUDIO_SINK@", "0"], check=True)
-            is_muted = False
-            print("Unmuted")
-        else:
-            # Mute
-            subprocess.run(["wpctl", "set-mute", "@DEFAULT_AUDIO_SINK@", "1"], check=True)
-            is_muted = True
-            print("Muted")
+        issued = time.time()
+        backend.sync()
+        backend.set_mute(not backend.muted)
+        if recorder is not None and event_time is not None:
+            recorder.record(f"mute:{backend.name}", event_time, issued, time.time())
+        print("Muted" if backend.muted else "Unmuted")
     except Exception as e:
         print(f"Failed to toggle mute status: {e}")
 
-def continuous_volume_adjustment():
-    global continuous_adjustment, adjustment_direction
-    while True:
-        with adjustment_lock:
-            if continuous_adjustment and adjustment_direction != 0:
-                adjust_volume(adjustment_direction * 5)  
-        time.sleep(0.1)  
+class KeyRepeater:
+    """Runs `action(direction, held, event_time)` on key press and again while the key stays down.
 
-adjustment_thread = threading.Thread(target=continuous_volume_adjustment, daemon=True)
-adjustment_thread.start()
+    Repeats are driven by a threading.Timer that only exists while a key is
+    held, so nothing wakes up between key presses. Kernel autorepeat events
+    (value 2) are not needed and are ignored. `event_time` is the press
+    timestamp passed to press() and None for repeats.
+    """
 
-try:
-    # Initialize by getting current volume status
-    current_volume = get_current_volume()
-    print(f"Current volume: {current_volume}%, Mute status: {is_muted}")
-   
-    for event in device.read_loop():
-        if event.type == ecodes.EV_KEY:
-            key_event = categorize(event)
-            current_time = time.time()
-
-            print(f"Key event: code={event.code}, value={event.value}, keycode={key_event.keycode}")
-
-            if event.code == ecodes.KEY_MUTE:
-                if event.value == 1:  
-                    toggle_mute()
-                continue
-
-            if event.code == ecodes.KEY_VOLUMEDOWN:
-                if event.value == 1:  
-                    with adjustment_lock:
-                        continuous_adjustment = True
-                        adjustment_direction = -1
-                elif event.value == 0: 
-                    with adjustment_lock:
-                        continuous_adjustment = False
-                        adjustment_direction = 0
-
-            elif event.code == ecodes.KEY_VOLUMEUP:
-                if event.value == 1:  
-                    with adjustment_lock:
-                        continuous_adjustment = True
-                        adjustment_direction = 1
-                elif event.value == 0:  
-                    with adjustment_lock:
-                        continuous_adjustment = False
-                        adjustment_direction = 0
-
-except KeyboardInterrupt:
-    print("\nProgram exited")
-finally:
-    device.close()
+    def __init__(self, action, delay=REPEAT_DELAY, rate=REPEAT_RATE,
+                 acceleration=REPEAT_ACCELERATION, max_rate=REPEAT_MAX_RATE):
+        self.action = action
+        self.delay = delay
+        self.rate = rate
+        self.acceleration = acceleration
+        self.max_rate = max_rate
+        self.lock = threading.Lock()
+        self.timer = None
+        self.direction = 0
+        self.current_rate = rate
+        self.pressed = 0.0
+        # Bumped on every press/release so a timer that already fired does nothing
+        self.generation = 0
+
+    def _schedule(self, interval):
+        self.timer = threading.Timer(interval, self._repeat, args=(self.generation,))
+        self.timer.daemon = True
+        self.timer.start()
+
+    def press(self, direction, event_time=None):
+        with self.lock:
+            self._cancel()
+            self.direction = direction
+            self.current_rate = self.rate
+            self.pressed = time.monotonic()
+            self._schedule(self.delay)
+        self.action(direction, 0.0, event_time)
+
+    def release(self, direction):
+        with self.lock:
+            if direction == self.direction:
+                self._cancel()
+                self.direction = 0
+
+    def _cancel(self):
+        self.generation += 1
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+
+    def _repeat(self, generation):
+        with self.lock:
+            if generation != self.generation:
+                return
+            direction = self.direction
+            held = time.monotonic() - self.pressed
+        self.action(direction, held, None)
+        # Next repeat is timed from the end of this one, so a slow backend never piles up timers
+        with self.lock:
+            if generation != self.generation:
+                return
+            self._schedule(1.0 / self.current_rate)
+            self.current_rate = min(self.current_rate * self.acceleration, self.max_rate)
+
+    def stop(self):
+        with self.lock:
+            self._cancel()
+
+def main():
+    parser = argparse.ArgumentParser(description="Volume key handler")
+    parser.add_argument("--repeat-delay", type=float, default=REPEAT_DELAY,
+                        help="seconds a key is held before it starts repeating")
+    parser.add_argument("--repeat-rate", type=float, default=REPEAT_RATE, help="initial repeats per second")
+    parser.add_argument("--acceleration", type=float, default=REPEAT_ACCELERATION,
+                        help="repeat rate multiplier per step, 1 for a constant rate")
+    parser.add_argument("--max-rate", type=float, default=REPEAT_MAX_RATE, help="repeats per second cap")
+    parser.add_argument("--max-step", type=int, default=VOLUME_STEP_MAX,
+                        help=f"largest volume step in %% while a key is held (first step is {VOLUME_STEP}%%)")
+    args = parser.parse_args()
+
+    device = InputDevice(DEVICE_PATH)
+    backend = open_backend()
+    recorder = LatencyRecorder()
+    recorder.install_signal_handler()
+    volume = VolumeCoalescer(backend, recorder)
+    repeater = KeyRepeater(lambda direction, held, event_time:
+                           volume.step(direction * step_size(held, args.max_step), event_time),
+                           args.repeat_delay, args.repeat_rate, args.acceleration, args.max_rate)
+    directions = {ecodes.KEY_VOLUMEDOWN: -1, ecodes.KEY_VOLUMEUP: 1}
+
+    try:
+        print(f"Current volume: {backend.volume}%, Mute status: {backend.muted} (backend: {backend.name})")
+
+        for event in device.read_loop():
+            if event.type == ecodes.EV_KEY:
+                key_event = categorize(event)
+
+                if event.value != 2:
+                    print(f"Key event: code={event.code}, value={event.value}, keycode={key_event.keycode}")
+
+                if event.code == ecodes.KEY_MUTE:
+                    if event.value == 1:
+                        volume.toggle_mute(event.timestamp())
+                    continue
+
+                if event.code in directions:
+                    if event.value == 1:
+                        repeater.press(directions[event.code], event.timestamp())
+                    elif event.value == 0:
+                        repeater.release(directions[event.code])
+
+    except KeyboardInterrupt:
+        print("\nProgram exited")
+    finally:
+        repeater.stop()
+        backend.close()
+        device.close()
+
+if __name__ == "__main__":
+    main()